@@ -9,6 +9,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 def pytest_configure(config):
     """Configure pytest to handle deprecation warnings."""
     os.environ['JUPYTER_PLATFORM_DIRS'] = '1'
+    # Templates compiled by the tests are not kept across runs
+    os.environ['XDUFACOOL_JINJA_CACHE'] = 'off'
     warnings.simplefilter('ignore', DeprecationWarning)
     # warnings.filterwarnings(
     #     "ignore",
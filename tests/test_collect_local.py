@@ -0,0 +1,468 @@
+import os
+import sys
+import pytest
+from zipfile import ZIP_DEFLATED, ZipFile
+from nbformat.v4 import new_notebook, new_code_cell, new_output
+from xdufacool.collect_local import merge_csv
+from xdufacool.collect_local import clear_homework_path
+from xdufacool.collect_local import find_duplication
+from xdufacool.collect_local import write_dict_to_csv, load_csv_to_dict
+from xdufacool.collect_local import extract_submission_info
+from xdufacool.collect_local import truncate_long_outputs
+from xdufacool.collect_local import ensure_figures_available
+from xdufacool.collect_local import extract_ipynb_submission, extract_zip, collect_reports
+from xdufacool.collect_local import prepare_ipynb_submissions, compile_ipynb_submissions
+from xdufacool.collect_local import process_ipynb_submissions, formalize_homework_submissions
+from xdufacool.collect_local import merge_pdfs
+from xdufacool.collect_local import HomeworkManager
+from xdufacool import collect_local
+
+
+def write_rows(filename, rows):
+    with open(filename, 'w') as f:
+        f.write("\n".join(",".join(row) for row in rows) + "\n")
+
+
+def test_merge_csv(tmp_path):
+    """Keys missing from a file are padded with zeros of that file's width."""
+    first, second = tmp_path / "first.csv", tmp_path / "second.csv"
+    write_rows(first, [["001", "90"], ["002", "80"]])
+    write_rows(second, [["002", "7", "8"], ["003", "5", "6"]])
+
+    merged = merge_csv([first, second])
+    assert merged == {"001": ["90", "0", "0"],
+                      "002": ["80", "7", "8"],
+                      "003": ["0", "5", "6"]}
+
+    third = tmp_path / "third.csv"
+    write_rows(third, [["003", "1"]])
+    merged = merge_csv([first, second, third, first])
+    assert merged == {"001": ["90", "0", "0", "0", "90"],
+                      "002": ["80", "7", "8", "0", "80"],
+                      "003": ["0", "5", "6", "1", "0"]}
+
+
+def test_clear_homework_path(tmp_path, monkeypatch):
+    """Only the zip files directly under each student directory are kept."""
+    student_dir = tmp_path / "MLEN-HW24E01" / "21009100517"
+    (student_dir / "extracted" / "nested").mkdir(parents=True)
+    (student_dir / "extracted" / "nested" / "inner.zip").touch()
+    (student_dir / "submission.zip").touch()
+    (student_dir / "report.pdf").touch()
+    monkeypatch.chdir(tmp_path)
+
+    assert clear_homework_path("HW24E01") == 1
+    assert sorted(p.name for p in student_dir.iterdir()) == ["submission.zip"]
+    assert [p.name for p in student_dir.parent.iterdir()] == ["21009100517"]
+    assert clear_homework_path("HW24E02") == 0
+
+
+def test_find_duplication(tmp_path):
+    """Only checksums shared by more than one student are reported."""
+    checksums = tmp_path / "checksums.txt"
+    checksums.write_text("aaaa PRML-HW01/21009100517/hw.py\n"
+                         "bbbb PRML-HW01/21009100518/hw.py\n"
+                         "aaaa PRML-HW01/21009100516/hw.py\n"
+                         "\n")
+    assert find_duplication(checksums) == [("aaaa", ["21009100516", "21009100517"])]
+
+
+def test_write_dict_to_csv(tmp_path):
+    """Rows are written sorted by key and can be loaded back."""
+    filename = tmp_path / "scores.csv"
+    write_dict_to_csv(filename, {"002": [80], "001": [90, 1]})
+    assert filename.read_bytes() == b"001,90,1\r\n002,80\r\n"
+    assert load_csv_to_dict(filename) == ({"001": ["90", "1"], "002": ["80"]}, 2)
+
+
+def test_extract_submission_info():
+    info = extract_submission_info("dir/MLEN-HW24E02-21009100517-Li Hua.zip")
+    assert info == ("Li Hua", "21009100517", "Logistic Regression (HW24E02)")
+    info = extract_submission_info("MLEN-HW24E09-H00392690-Wu.zip")
+    assert info == ("Wu", "H00392690", "Unknown (HW24E09)")
+
+
+def test_truncate_long_outputs():
+    """Outputs longer than max_lines keep their first and last max_lines/2 lines."""
+    long_text = "".join(f"Line {i}\n" for i in range(100))
+    short_text = "".join(f"Line {i}\n" for i in range(8))
+    nb = new_notebook()
+    nb.cells.append(new_code_cell("", outputs=[
+        new_output("stream", name="stdout", text=long_text),
+        new_output("stream", name="stdout", text=short_text)]))
+
+    truncate_long_outputs(nb, max_lines=8)
+    outputs = nb.cells[0].outputs
+    assert outputs[0].text == ("Line 0\nLine 1\nLine 2\nLine 3"
+                               "\n...[Output truncated due to length]...\n"
+                               "Line 96\nLine 97\nLine 98\nLine 99")
+    assert outputs[1].text == short_text
+
+
+def test_ensure_figures_available(tmp_path, monkeypatch):
+    """Missing figures are provided from the assignment directory, once per batch."""
+    assignment_dir, figures_dir = tmp_path / "assignment", tmp_path / "figures"
+    assignment_dir.mkdir()
+    (assignment_dir / "figure1.png").write_bytes(b"figure 1")
+    (assignment_dir / "figure2.png").write_bytes(b"figure 2")
+    figures_dir.mkdir()
+    (figures_dir / "figure2.png").write_bytes(b"own figure 2")
+
+    ensured = set()
+    ensure_figures_available(str(assignment_dir), str(figures_dir),
+                             ["figure1.png", "figure2.png", "figure3.png"], ensured)
+    assert (figures_dir / "figure1.png").read_bytes() == b"figure 1"
+    assert (figures_dir / "figure2.png").read_bytes() == b"own figure 2"
+    assert not (figures_dir / "figure3.png").exists()
+
+    def fail(*args):
+        raise AssertionError("figures are listed again")
+
+    monkeypatch.setattr(os, "listdir", fail)
+    ensure_figures_available(str(assignment_dir), str(figures_dir),
+                             ["figure1.png", "figure2.png", "figure3.png"], ensured)
+
+    # Without the set of the batch, a removed figure is provided again
+    monkeypatch.undo()
+    (figures_dir / "figure1.png").unlink()
+    ensure_figures_available(str(assignment_dir), str(figures_dir),
+                             ["figure1.png", "figure2.png", "figure3.png"])
+    assert (figures_dir / "figure1.png").read_bytes() == b"figure 1"
+
+
+def test_extract_ipynb_submission(tmp_path):
+    """Members are extracted next to the zip file without their common folder."""
+    zip_file = tmp_path / "MLEN-HW24E01-21009100517-Li.zip"
+    with ZipFile(zip_file, 'w') as zip_ref:
+        zip_ref.writestr("HW24E01/homework.ipynb", "{}")
+        zip_ref.writestr("HW24E01/data/train.csv", "1,2")
+        zip_ref.writestr("HW24E01/.ipynb_checkpoints/homework.ipynb", "{}")
+        zip_ref.writestr("__MACOSX/HW24E01/._homework.ipynb", "")
+
+    extract_ipynb_submission(str(zip_file))
+    assert (tmp_path / "homework.ipynb").read_text() == "{}"
+    assert (tmp_path / "data" / "train.csv").read_text() == "1,2"
+    assert not (tmp_path / ".ipynb_checkpoints").exists()
+    assert not (tmp_path / "HW24E01").exists()
+
+
+def test_extract_ipynb_submission_many_members(tmp_path):
+    """Archives with many members are extracted by several threads."""
+    zip_file = tmp_path / "MLEN-HW24E01-21009100517-Li.zip"
+    with ZipFile(zip_file, 'w', compression=ZIP_DEFLATED) as zip_ref:
+        zip_ref.writestr("HW24E01/homework.ipynb", "{}")
+        for i in range(32):
+            zip_ref.writestr(f"HW24E01/figures/fig{i}.txt", f"figure {i}\n" * 1000)
+
+    extract_ipynb_submission(str(zip_file))
+    for i in range(32):
+        assert (tmp_path / "figures" / f"fig{i}.txt").read_text() == f"figure {i}\n" * 1000
+
+
+@pytest.fixture
+def submission_tree(tmp_path):
+    """A base directory with submissions of two assignments."""
+    files = ["MLEN-HW24E01/21009100517/MLEN-HW24E01-21009100517-Li.zip",
+             "MLEN-HW24E01/21009100518/MLEN-HW24E01-21009100518-Wang.pdf",
+             "MLEN-HW24E01/21009100518/notes.txt",
+             "MLEN-HW24E02/21009100517/MLEN-HW24E02-21009100517-Li.pdf"]
+    for name in files:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).touch()
+    return tmp_path
+
+
+def test_homework_manager_collect_submissions(submission_tree):
+    manager = HomeworkManager(str(submission_tree), "MLEN", assignment_ids=["HW24E01"])
+    manager.collect_submissions()
+    assert list(manager.assignments) == ["HW24E01"]
+    students = manager.assignments["HW24E01"]
+    assert sorted(students) == ["21009100517", "21009100518"]
+    assert students["21009100518"]["rel_path"] == \
+        "MLEN-HW24E01/21009100518/MLEN-HW24E01-21009100518-Wang.pdf"
+
+    manager = HomeworkManager(str(submission_tree), "MLEN")
+    manager.collect_submissions()
+    assert sorted(manager.assignments) == ["HW24E01", "HW24E02"]
+
+
+def test_homework_manager_keeps_latest_submission(submission_tree):
+    student_dir = submission_tree / "MLEN-HW24E01/21009100518"
+    older = student_dir / "MLEN-HW24E01-21009100518-Wang.pdf"
+    newer = student_dir / "resubmit/MLEN-HW24E01-21009100518-Wang.pdf"
+    newer.parent.mkdir()
+    newer.touch()
+    os.utime(older, (1000, 1000))
+    os.utime(newer, (2000, 2000))
+    manager = HomeworkManager(str(submission_tree), "MLEN", assignment_ids=["HW24E01"])
+    manager.collect_submissions()
+    info = manager.assignments["HW24E01"]["21009100518"]
+    assert info["rel_path"] == "MLEN-HW24E01/21009100518/resubmit/MLEN-HW24E01-21009100518-Wang.pdf"
+    assert info["timestamp"] == 2000
+
+
+def test_homework_manager_extract_and_process_submissions(submission_tree):
+    zip_file = submission_tree / "MLEN-HW24E01/21009100517/MLEN-HW24E01-21009100517-Li.zip"
+    with ZipFile(zip_file, "w") as zf:
+        zf.writestr("report/HW24E01.pdf", b"%PDF-1.4")
+        zf.writestr("report/data.csv", "x,y\n")
+        zf.writestr("__MACOSX/report/._HW24E01.pdf", b"")
+    manager = HomeworkManager(str(submission_tree), "MLEN", assignment_ids=["HW24E01"])
+    manager.collect_submissions()
+    manager.extract_and_process_submissions()
+    info = manager.assignments["HW24E01"]["21009100517"]
+    assert info["file_ext"] == ".pdf"
+    assert info["rel_path"] == "MLEN-HW24E01/21009100517/MLEN-HW24E01-21009100517-Li/report/HW24E01.pdf"
+    assert not (zip_file.with_suffix("") / "report/data.csv").exists()
+    assert not (zip_file.with_suffix("") / "__MACOSX").exists()
+
+
+def test_homework_manager_student_mapper(submission_tree):
+    mapping_csv = submission_tree / "students.csv"
+    mapping_csv.write_text("英方学号,西电学号,姓名,FIRST_NAME,LAST_NAME\n"
+                           "H00392690,21009100517,李华,Hua,Li\n", encoding="utf-8")
+    manager = HomeworkManager(str(submission_tree), "MLEN", mapping_csv=str(mapping_csv),
+                              assignment_ids=["HW24E01"])
+    manager.collect_submissions()
+    students = manager.assignments["HW24E01"]
+    assert students["21009100517"]["student_name"] == "Hua Li"
+    assert students["21009100518"]["student_name"] == "Wang"
+
+
+@pytest.mark.parametrize("link_mode", ["hardlink", "reflink", "copy"])
+def test_homework_manager_organize_submissions(submission_tree, link_mode):
+    src = submission_tree / "MLEN-HW24E01/21009100518/MLEN-HW24E01-21009100518-Wang.pdf"
+    src.write_bytes(b"%PDF-1.4")
+    manager = HomeworkManager(str(submission_tree), "MLEN", assignment_ids=["HW24E01"],
+                              link_mode=link_mode)
+    manager.collect_submissions()
+    for _ in range(2):
+        manager.organize_submissions()
+    dst = (submission_tree / "MLEN-HW24E01-formalized/21009100518"
+           / "MLEN-HW24E01-21009100518-Wang.pdf")
+    assert dst.read_bytes() == src.read_bytes() == b"%PDF-1.4"
+    assert dst.samefile(src) == (link_mode == "hardlink")
+    assert (submission_tree / ".xdufacool_manifest.json").exists()
+
+
+def test_formalize_homework_submissions(submission_tree, monkeypatch):
+    mapping_csv = submission_tree / "students.csv"
+    mapping_csv.write_text("英方学号,西电学号,姓名,FIRST_NAME,LAST_NAME\n"
+                           "H00392690,21009100518,王伟,Wei,Wang\n", encoding="utf-8")
+    monkeypatch.chdir(submission_tree)
+    for _ in range(2):
+        assert formalize_homework_submissions("HW24E01", str(mapping_csv)) == 1
+    src = submission_tree / "MLEN-HW24E01/21009100518/MLEN-HW24E01-21009100518-Wang.pdf"
+    dst = (submission_tree / "MLEN-HW24E01-formalized/21009100518"
+           / "MLEN-HW24E01-21009100518-Wei Wang.pdf")
+    assert dst.samefile(src)
+
+def test_homework_manager_merge_assignment_pdfs(submission_tree, monkeypatch):
+    manager = HomeworkManager(str(submission_tree), "MLEN")
+    manager.collect_submissions()
+    compiled = {}
+
+    def compile_pdf(tex_content, output_dir, output_name, clean_up=True):
+        compiled[output_name] = tex_content
+        pdf_path = f"{output_dir}/{output_name}.pdf"
+        open(pdf_path, "wb").close()
+        return pdf_path
+
+    monkeypatch.setattr(manager.latex_converter, "compile_pdf", compile_pdf)
+    manager.merge_assignment_pdfs()
+    assert sorted(compiled) == ["MLEN-HW24E01-merged", "MLEN-HW24E02-merged"]
+    assert "MLEN-HW24E01/21009100518/MLEN-HW24E01-21009100518-Wang.pdf" in compiled["MLEN-HW24E01-merged"]
+
+    # Only the assignment with a changed submission is merged again
+    compiled.clear()
+    pdf_file = submission_tree / "MLEN-HW24E02/21009100517/MLEN-HW24E02-21009100517-Li.pdf"
+    pdf_file.write_bytes(b"%PDF-1.4")
+    manager = HomeworkManager(str(submission_tree), "MLEN")
+    manager.collect_submissions()
+    monkeypatch.setattr(manager.latex_converter, "compile_pdf", compile_pdf)
+    manager.merge_assignment_pdfs()
+    assert list(compiled) == ["MLEN-HW24E02-merged"]
+
+    # A change of the rendered document, e.g. of its template, merges all again
+    compiled.clear()
+    manager = HomeworkManager(str(submission_tree), "MLEN")
+    manager.collect_submissions()
+    render_template = manager.latex_converter.render_template
+    monkeypatch.setattr(manager.latex_converter, "render_template",
+                        lambda *args, **kwargs: render_template(*args, **kwargs) + "%")
+    monkeypatch.setattr(manager.latex_converter, "compile_pdf", compile_pdf)
+    manager.merge_assignment_pdfs()
+    assert sorted(compiled) == ["MLEN-HW24E01-merged", "MLEN-HW24E02-merged"]
+
+    # Another day alone does not merge again
+    compiled.clear()
+    assert manager._merge_assignment_pdf("HW24E01", manager.assignments["HW24E01"], "1970-01-01")
+    assert compiled == {}
+
+
+def test_merge_pdfs(tmp_path):
+    pypdf = pytest.importorskip("pypdf")
+    pdf_files = []
+    for student_id, n_pages in [("21009100517", 2), ("21009100518", 1)]:
+        writer = pypdf.PdfWriter()
+        for _ in range(n_pages):
+            writer.add_blank_page(width=72, height=72)
+        (tmp_path / student_id).mkdir()
+        writer.write(tmp_path / student_id / "homework.pdf")
+        pdf_files.append((f"{student_id}/homework.pdf", "Li", student_id, "HW24E01"))
+
+    output_pdf = str(tmp_path / "HW24E01.pdf")
+    assert merge_pdfs("HW24E01", pdf_files, output_pdf)
+    reader = pypdf.PdfReader(output_pdf)
+    assert len(reader.pages) == 3
+    assert [item.title for item in reader.outline] == ["Li (21009100517)", "Li (21009100518)"]
+
+def test_compile_ipynb_submissions_per_student(tmp_path, monkeypatch, caplog):
+    """Identical notebooks of different students are reported, but each gets its own PDF."""
+    zip_files = []
+    for student_id, student_name in [("21009100517", "Li"), ("21009100518", "Wang")]:
+        student_dir = tmp_path / student_id
+        student_dir.mkdir()
+        (student_dir / "homework.ipynb").write_text('{"cells": []}')
+        zip_files.append(str(student_dir / f"MLEN-HW24E01-{student_id}-{student_name}.zip"))
+
+    def prepare(ipynb_file, *args):
+        return os.path.splitext(ipynb_file)[0] + ".tex"
+
+    compiled = []
+
+    def compile_tex(tex_file):
+        compiled.append(tex_file)
+        pdf_file = os.path.splitext(tex_file)[0] + ".pdf"
+        open(pdf_file, "wb").close()
+        return os.path.relpath(pdf_file, os.path.dirname(os.path.dirname(pdf_file)))
+
+    monkeypatch.setattr(collect_local, "prepare_ipynb_submission", prepare)
+    monkeypatch.setattr(collect_local, "compile_ipynb_texs",
+                        lambda tex_files: [compile_tex(f) for f in tex_files])
+    jobs, notebook_owners = [], {}
+    for zip_file in zip_files:
+        jobs.extend(prepare_ipynb_submissions(zip_file, "", [], notebook_owners, extract=False))
+    pdf_files = compile_ipynb_submissions(jobs)
+    assert sorted(compiled) == [str(tmp_path / "21009100517" / "homework.tex"),
+                                str(tmp_path / "21009100518" / "homework.tex")]
+    assert "identical to that of 21009100517" in caplog.text
+    assert [item[:3] for item in pdf_files] == [
+        ("21009100517/homework.pdf", "Li", "21009100517"),
+        ("21009100518/homework.pdf", "Wang", "21009100518")]
+    st1 = (tmp_path / "21009100517" / "homework.pdf").stat()
+    st2 = (tmp_path / "21009100518" / "homework.pdf").stat()
+    assert st1.st_ino != st2.st_ino
+
+
+def test_extract_zip(tmp_path, monkeypatch):
+    """Files are extracted flat next to the zip file without changing directory."""
+    zip_file = tmp_path / "hw" / "MLEN-HW24E01-21009100517-Li.zip"
+    zip_file.parent.mkdir()
+    with ZipFile(zip_file, 'w') as zip_ref:
+        zip_ref.writestr("HW24E01/code/main.py", "print(1)")
+        zip_ref.writestr("__MACOSX/HW24E01/._main.py", "")
+    monkeypatch.chdir(tmp_path)
+
+    extract_zip(str(zip_file))
+    assert os.getcwd() == str(tmp_path)
+    assert (zip_file.parent / "main.py").read_text() == "print(1)"
+    assert not (zip_file.parent / "._main.py").exists()
+
+
+def test_extract_archive_unsafe_entries(tmp_path, monkeypatch):
+    """Entries outside dest and links are skipped, names merely starting with dots are not."""
+    class Entry:
+        def __init__(self, pathname, issym=False):
+            self.pathname, self.issym = pathname, issym
+            self.islnk = self.isdir = False
+
+        def get_blocks(self):
+            yield self.pathname.encode()
+
+    class Reader:
+        def __enter__(self):
+            return [Entry("..notes.txt"), Entry("../escaped.txt"), Entry("/etc/escaped.txt"),
+                    Entry("hw/link.py", issym=True), Entry("hw/main.py")]
+
+        def __exit__(self, *args):
+            return False
+
+    libarchive = type(sys)("libarchive")
+    libarchive.file_reader = lambda filename: Reader()
+    monkeypatch.setitem(sys.modules, "libarchive", libarchive)
+    dest = tmp_path / "dest"
+    dest.mkdir()
+
+    collect_local._extract_archive("homework.rar", str(dest))
+    assert (dest / "..notes.txt").read_text() == "..notes.txt"
+    assert (dest / "hw" / "main.py").read_text() == "hw/main.py"
+    assert not (dest / "hw" / "link.py").exists()
+    assert not (tmp_path / "escaped.txt").exists()
+    assert sorted(os.listdir(dest)) == ["..notes.txt", "hw"]
+
+
+def test_extract_zip_gbk_names(tmp_path):
+    """Names without the UTF-8 flag are decoded as GB18030."""
+    zip_file = tmp_path / "MLEN-HW24E01-21009100517-Li.zip"
+    name = "作业.py".encode("gbk")
+    placeholder = b"X" * (len(name) - 3) + b".py"
+    with ZipFile(zip_file, 'w') as zip_ref:
+        zip_ref.writestr(placeholder.decode("ascii"), "print(1)")
+    zip_file.write_bytes(zip_file.read_bytes().replace(placeholder, name))
+
+    extract_zip(str(zip_file))
+    assert (tmp_path / "作业.py").read_text() == "print(1)"
+
+
+def test_collect_reports(tmp_path):
+    """Reports are found in nested directories and inside zip files."""
+    for student_id, name in [("21009100517", "Li"), ("21009100518", "Wang")]:
+        (tmp_path / student_id).mkdir()
+        (tmp_path / student_id / f"MLEN-HW24E03-{student_id}-{name}.pdf").touch()
+    (tmp_path / "21009100519").mkdir()
+    with ZipFile(tmp_path / "21009100519" / "MLEN-HW24E03-21009100519-Zhao.zip", 'w') as zip_ref:
+        zip_ref.writestr("report.pdf", b"%PDF-1.4")
+
+    reports = sorted(collect_reports(str(tmp_path)))
+    assert reports == [
+        ("21009100517/MLEN-HW24E03-21009100517-Li.pdf", "Li", "21009100517", "Report"),
+        ("21009100518/MLEN-HW24E03-21009100518-Wang.pdf", "Wang", "21009100518", "Report"),
+        ("21009100519/report.pdf", "Zhao", "21009100519", "Report")]
+
+    extracted = tmp_path / "21009100519" / "report.pdf"
+    mtime = extracted.stat().st_mtime_ns
+    assert sorted(collect_reports(str(tmp_path))) == reports
+    assert extracted.stat().st_mtime_ns == mtime
+
+
+def test_prepare_ipynb_submissions_up_to_date(tmp_path, monkeypatch):
+    """Notebooks with a PDF compiled from their current content are not compiled again."""
+    student_dir = tmp_path / "21009100517"
+    student_dir.mkdir()
+    ipynb_file, pdf_file = student_dir / "homework.ipynb", student_dir / "homework.pdf"
+    ipynb_file.write_text('{"cells": []}')
+    pdf_file.touch()
+    collect_local._stamp_pdf(str(pdf_file), str(ipynb_file))
+    zip_file = str(student_dir / "MLEN-HW24E01-21009100517-Li.zip")
+
+    def fail(*args):
+        raise AssertionError("up-to-date notebook converted")
+
+    monkeypatch.setattr(collect_local, "prepare_ipynb_submission", fail)
+    monkeypatch.setattr(collect_local, "compile_ipynb_tex", fail)
+    pdf_files = process_ipynb_submissions(zip_file, "", [], extract=False)
+    assert pdf_files == [("21009100517/homework.pdf", "Li", "21009100517", "Linear Regression (HW24E01)")]
+
+
+def test_up_to_date_pdf_changed_notebook(tmp_path):
+    """A resubmitted notebook older than the PDF is compiled again once its content changed."""
+    ipynb_file, pdf_file = tmp_path / "homework.ipynb", tmp_path / "homework.pdf"
+    ipynb_file.write_text('{"cells": []}')
+    pdf_file.touch()
+    collect_local._stamp_pdf(str(pdf_file), str(ipynb_file))
+    assert collect_local._up_to_date_pdf(str(ipynb_file), "", []) == f"{tmp_path.name}/homework.pdf"
+
+    ipynb_file.write_text('{"cells": [{"cell_type": "markdown", "source": "x"}]}')
+    os.utime(ipynb_file, (1000, 1000))
+    assert collect_local._up_to_date_pdf(str(ipynb_file), "", []) is None
@@ -1,12 +1,15 @@
 # -*- coding: utf-8 -*-
 import datetime
+import hashlib
 import os
+import tempfile
 from unittest import TestCase
 
 from xdufacool.homework_manager import Homework
 from xdufacool.homework_manager import Submission
 from xdufacool.homework_manager import HomeworkManager
-from xdufacool.homework_manager import load_and_hash
+from xdufacool.homework_manager import AttachmentStore
+from xdufacool.homework_manager import load_and_hash, hash_file, save_and_hash
 from xdufacool.homework_manager import parse_subject
 
 
@@ -20,6 +23,15 @@ class TestFunctions(TestCase):
         msg += "\nActual: " + sha256
         self.assertEqual(sha256, sha256_gt, msg=msg)
 
+    def test_hash_file(self):
+        fn = "tests/1402015/14020150099/homework.py"
+        sha256, data = load_and_hash(fn)
+        self.assertEqual(hash_file(fn), sha256)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, "homework.py")
+            self.assertEqual(save_and_hash(output, data, chunk_size=64), sha256)
+            self.assertEqual(hash_file(output), sha256)
+
     def test_parse_subject(self):
         subject = "PRML-HW23E03-21009100517-谢某甲"
         student_id_ref = "21009100517"
@@ -68,3 +80,40 @@ class TestHomework(TestCase):
         hw.check_local("tests/1402015")
         sha01 = "ccd40fb582c2043cc117ff7e738c2ca6d88a29d477c8fec32811b238c4c8c198"
         self.assertIn(sha01, hw.data)
+
+    def test_add_file(self):
+        hw = Submission(1000, self.header)
+        for filename in ["homework.py", "copy.py", "homework.py"]:
+            hw.add_file("ccd40fb5", filename)
+        self.assertEqual(list(hw.checksums), ["ccd40fb5 homework.py", "ccd40fb5 copy.py"])
+        self.assertEqual(hw.exts, {".py"})
+        hw.add_file("9f86d081", "Homework.TAR.GZ")
+        self.assertEqual(hw.exts, {".py", ".tar.gz"})
+
+
+class TestAttachmentStore(TestCase):
+    def test_save_and_reload(self):
+        with tempfile.TemporaryDirectory() as folder:
+            os.mkdir(os.path.join(folder, "14020150098"))
+            os.mkdir(os.path.join(folder, "14020150099"))
+            store = AttachmentStore(folder)
+            sha256, saved = store.save("14020150098/homework.py", b"print(1)\n")
+            self.assertTrue(saved)
+            store.add_email("1000", ["14020150098/homework.py"])
+            # Identical content is linked instead of written again
+            store.save("14020150099/homework.py", b"print(1)\n")
+            st1 = os.stat(os.path.join(folder, "14020150098/homework.py"))
+            st2 = os.stat(os.path.join(folder, "14020150099/homework.py"))
+            self.assertEqual(st1.st_ino, st2.st_ino)
+            self.assertEqual(store.save("14020150099/homework.py", b"print(2)\n")[1], False)
+            # Overwriting a linked file leaves the other one alone
+            store.save("14020150099/homework.py", b"print(2)\n", overwrite=True,
+                       sha256=hashlib.sha256(b"print(2)\n").hexdigest())
+            with open(os.path.join(folder, "14020150098/homework.py"), 'rb') as f:
+                self.assertEqual(f.read(), b"print(1)\n")
+            store.dump()
+
+            store = AttachmentStore(folder)
+            self.assertTrue(store.has_email("1000"))
+            self.assertFalse(store.has_email("1001"))
+            self.assertEqual(store.digest("14020150098/homework.py"), sha256)
@@ -3,6 +3,7 @@ import shutil
 import pytest
 from pathlib import Path
 from xdufacool.latex_converter import LaTeXConverter
+from xdufacool.utils import jinja_bytecode_cache
 
 # Test fixtures
 @pytest.fixture
@@ -42,6 +43,24 @@ def test_init_custom_template_dir(temp_dir):
     converter = LaTeXConverter(str(template_dir))
     assert str(template_dir) in converter.template_loader.searchpath
 
+def test_shared_template_env(temp_dir):
+    """Converters of the same template directory share the compiled templates."""
+    template_dir = temp_dir / "shared_templates"
+    template_dir.mkdir()
+    first, second = LaTeXConverter(str(template_dir)), LaTeXConverter(str(template_dir))
+    assert first.template_env is second.template_env
+    assert LaTeXConverter().template_env is not first.template_env
+    converters = pytest.importorskip("xdufacool.converters")
+    assert converters.LaTeXConverter().template_env is LaTeXConverter().template_env
+
+def test_jinja_bytecode_cache(temp_dir, monkeypatch):
+    """Compiled templates are cached in the given folder, unless disabled."""
+    monkeypatch.setenv("XDUFACOOL_JINJA_CACHE", str(temp_dir / "cache"))
+    assert jinja_bytecode_cache().directory == str(temp_dir / "cache")
+    assert (temp_dir / "cache").stat().st_mode & 0o077 == 0
+    monkeypatch.setenv("XDUFACOOL_JINJA_CACHE", "off")
+    assert jinja_bytecode_cache() is None
+
 def test_render_template(latex_converter):
     """Test template rendering."""
     content = "Hello, World!"
@@ -3,6 +3,7 @@ from unittest import TestCase
 
 from xdufacool.mail_helper import MailHelper
 import datetime
+import imaplib
 
 class TestMailHelper(TestCase):
     def test_iconv_header(self):
@@ -42,3 +43,80 @@ class TestMailHelper(TestCase):
         for line, line_ref in zip(text, text_ref.split("\n")):
             msg = "Expected: " + line_ref + "\nActual: " + line
             self.assertEqual(line, line_ref, msg=msg)
+
+    def test_fetch_headers(self):
+        class FakeIMAP:
+            def uid(self, command, message_set, items):
+                self.message_set, self.items = message_set, items
+                return 'OK', [
+                    (b'1 (UID 101 RFC822.SIZE 2048 BODY[HEADER.FIELDS (SUBJECT FROM)] {60}',
+                     b'Subject: HW1602-14020150099\r\nFrom: Zhou <zhou@qq.com>\r\n\r\n'),
+                    b')',
+                    (b'2 (UID 102 RFC822.SIZE 4096 BODY[HEADER.FIELDS (SUBJECT FROM)] {58}',
+                     b'Subject: HW1602-14020150098\r\nFrom: Wang <wang@qq.com>\r\n\r\n'),
+                    b')']
+
+        helper = MailHelper.__new__(MailHelper)
+        helper.imapclient = FakeIMAP()
+        headers = helper.fetch_headers(["101", "102"], ("subject", "from"))
+        self.assertEqual(helper.imapclient.message_set, "101,102")
+        self.assertEqual(helper.imapclient.items,
+                         "(RFC822.SIZE BODY.PEEK[HEADER.FIELDS (SUBJECT FROM)])")
+        self.assertEqual(sorted(headers), ["101", "102"])
+        self.assertEqual(headers["102"]["subject"], "HW1602-14020150098")
+        self.assertEqual(headers["102"]["from"], "wang@qq.com")
+        self.assertEqual(headers["101"]["size"], f"{2:6.3g} KB")
+
+    def test_uidvalidity(self):
+        class FakeIMAP:
+            def select(self, folder):
+                self.responses = {'UIDVALIDITY': [b'1234']}
+                return 'OK', [b'2']
+
+            def response(self, code):
+                return code, self.responses.pop(code, [None])
+
+        helper = MailHelper.__new__(MailHelper)
+        helper.imapclient = FakeIMAP()
+        self.assertIsNone(helper.uidvalidity())
+        helper.select('INBOX')
+        self.assertEqual(helper.uidvalidity(), '1234')
+        self.assertEqual(helper.uidvalidity(), '1234')
+
+    def test_noop(self):
+        class FakeIMAP:
+            alive = True
+
+            def noop(self):
+                if not self.alive:
+                    raise imaplib.IMAP4.abort('socket error: EOF')
+                return 'OK', [b'NOOP completed']
+
+        helper = MailHelper.__new__(MailHelper)
+        helper.imapclient = FakeIMAP()
+        self.assertTrue(helper.noop())
+        helper.imapclient.alive = False
+        self.assertFalse(helper.noop())
+
+    def test_fetch_emails(self):
+        def raw_email(text):
+            return (b'Content-Type: multipart/mixed; boundary="b"\r\n\r\n'
+                    b'--b\r\nContent-Type: text/plain; charset="utf-8"\r\n\r\nHello\r\n'
+                    b'--b\r\nContent-Type: text/x-python\r\n'
+                    b'Content-Disposition: attachment; filename="homework.py"\r\n\r\n'
+                    + text + b'\r\n--b--\r\n')
+
+        class FakeIMAP:
+            def uid(self, command, message_set, items):
+                self.items = items
+                return 'OK', [(b'1 (UID 101 BODY[] {200}', raw_email(b'print(1)')), b')',
+                              (b'2 (BODY[] {200}', raw_email(b'print(2)')), b' UID 102)']
+
+        helper = MailHelper.__new__(MailHelper)
+        helper.imapclient = FakeIMAP()
+        messages = helper.fetch_emails(["101", "102"])
+        self.assertEqual(helper.imapclient.items, "(UID BODY.PEEK[])")
+        self.assertEqual(sorted(messages), ["101", "102"])
+        body, attachments = messages["102"]
+        self.assertIn("Hello", body)
+        self.assertEqual(attachments, [("homework.py", b"print(2)")])
@@ -218,3 +218,47 @@ def test_challenge_submission_creation(setup_data):
     assert challenge_submission.results_file == "results.csv"
     assert challenge_submission.score == 0.0
     assert challenge_submission.rank is None
+
+def test_collect_report_submissions(tmp_path):
+    course = Course("CS101", "MLEN", "Machine Learning", "Fall 2024", [], None,
+                    2024, datetime(2024, 9, 1), "notification.md.j2")
+    assignment = ReportAssignment("HW24E03", course, "Report", "A report",
+                                  datetime(2024, 10, 1), "Write a report")
+    submission_dir = tmp_path / "MLEN-HW24E03"
+    (submission_dir / "21009100517").mkdir(parents=True)
+    (submission_dir / "21009100517" / "MLEN-HW24E03-21009100517-Li.pdf").touch()
+    (submission_dir / "21009100517" / "notes.txt").touch()
+    (submission_dir / "MLEN-HW24E03-old").mkdir()
+    assignment.collect_submissions(tmp_path)
+    assert list(assignment.submissions) == ["21009100517"]
+    submission = assignment.submissions["21009100517"]
+    assert submission.report_file == os.path.join("21009100517", "MLEN-HW24E03-21009100517-Li.pdf")
+    pdf_file = submission_dir / submission.report_file
+    assert submission.submission_date == datetime.fromtimestamp(pdf_file.stat().st_mtime)
+
+def test_collect_submissions_of_subclass(tmp_path):
+    class ExamAssignment(ReportAssignment):
+        pass
+
+    course = Course("CS101", "MLEN", "Machine Learning", "Fall 2024", [], None,
+                    2024, datetime(2024, 9, 1), "notification.md.j2")
+    assignment = ExamAssignment("HW24E04", course, "Exam", "An exam",
+                                datetime(2024, 11, 1), "Write answers")
+    student_dir = tmp_path / "MLEN-HW24E04" / "21009100518"
+    student_dir.mkdir(parents=True)
+    (student_dir / "MLEN-HW24E04-21009100518-Wang.pdf").touch()
+    assignment.collect_submissions(tmp_path)
+    assert isinstance(assignment.submissions["21009100518"], ReportSubmission)
+
+def test_collect_submissions_without_student(tmp_path, caplog):
+    course = Course("CS101", "MLEN", "Machine Learning", "Fall 2024", [], None,
+                    2024, datetime(2024, 9, 1), "notification.md.j2")
+    assignment = ReportAssignment("HW24E03", course, "Report", "A report",
+                                  datetime(2024, 10, 1), "Write a report")
+    student_dir = tmp_path / "MLEN-HW24E03" / "21009100517"
+    student_dir.mkdir(parents=True)
+    (student_dir / "MLEN-HW24E03.pdf").touch()
+    (student_dir / "MLEN-HW24E03-Li.pdf").touch()
+    assignment.collect_submissions(tmp_path)
+    assert assignment.submissions == {}
+    assert caplog.text.count("no student ID and name") == 2
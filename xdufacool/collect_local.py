@@ -23,17 +23,26 @@ import os
 import sys
 import glob
 import shutil
+import hashlib
 from pathlib import Path
+from types import MappingProxyType
 from zipfile import ZipFile
 import subprocess as subproc
 
 import csv
+import json
 import nbformat
 import subprocess
 import logging
 import zipfile
+import queue
 import tempfile
+import threading
 from datetime import date, datetime
+from functools import lru_cache
+from itertools import groupby
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 
 try:
     from xdufacool.converters import LaTeXConverter    
@@ -67,6 +76,85 @@ except ImportError:
 # Add the parent directory of xdufacool to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+# Patterns shared across calls, compiled once at import time
+_RE_STUID = re.compile(r'(?P<stuid>[0-9]{10,11})')
+_RE_ZIP_NAME = re.compile(r"(?P<course_key>[A-Z]{4})-(?P<assignment_id>HW\d+[A-Z]\d+)-(?P<student_id>[0-9]{11}X?)-(?P<student_name>.+)\.zip", re.IGNORECASE)
+_RE_UKU = re.compile(r'(?P<uku_id>[hH][0-9]{8})')
+_RE_XIDIAN = re.compile(r'(?P<xidian_id>[0-9]{11}[xX]?)')
+_RE_HW_ID = re.compile(r'(?<![^-/\\])HW\d+[A-Z]\d+')
+_RE_SID = re.compile(r'(?<!\d)\d{8,11}(?!\d)')
+
+_UNKNOWN = "Unknown"
+_MANIFEST_NAME = ".xdufacool_manifest.json"
+_EXERCISES_ROOT = "/home/fred/lectures/PRML/exercise"
+_SUBMISSION_EXTS = frozenset({".zip", ".pdf", ".ipynb"})
+_FIGURE_EXTS = ('.png', '.jpg', '.jpeg', '.gif', '.pdf')  # Add other image formats if needed
+# Titles and exercise folders of the homeworks
+_HOMEWORK_TITLES = MappingProxyType({
+    "HW24E01": "Linear Regression",
+    "HW24E02": "Logistic Regression",
+    "HW24E03": "Neural Networks",
+    "HW24E04": "Convolutional Neural Networks"
+})
+_ASSIGNMENT_DIRS = MappingProxyType({
+    "HW24E01": "regression",
+    "HW24E02": "classification",
+    "HW24E03": "neural-nets",
+    "HW24E04": "conv-nets"
+})
+
+def _scandir_files(top):
+    """Yield os.DirEntry objects of all files under top, without following symlinks.
+
+    Directories are visited with an explicit stack of os.scandir calls, so
+    the file type comes from the directory listing instead of a stat per file.
+    """
+    stack = [top]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+        except OSError as e:
+            logging.warning(f"Could not scan {e.filename}: {e}")
+
+def _iter_files_parallel(top, workers=8):
+    """Yield os.DirEntry objects of all files under top, reading directories concurrently.
+
+    Worker threads list the directories, so the latencies of directory reads
+    on cold caches or network filesystems overlap. New subdirectories are
+    scheduled by the consuming thread, which needs no locking. Files are
+    yielded in no particular order, callers sort them where it matters.
+    """
+    results = queue.Queue()
+
+    def scan(path):
+        try:
+            with os.scandir(path) as it:
+                results.put(list(it))
+        except OSError as e:
+            logging.warning(f"Could not scan {e.filename}: {e}")
+            results.put([])
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        executor.submit(scan, top)
+        pending = 1
+        while pending:
+            entries = results.get()
+            pending -= 1
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    executor.submit(scan, entry.path)
+                    pending += 1
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
 def temporal_func():
     classid = sys.argv[1]
 
@@ -85,77 +173,123 @@ def temporal_func():
                     if afile.endswith('.pdf'):
                         logging.info('    ' + afile)
 
-def move_file():
-    """Move files out of sub-directories in the current working directory."""
-    # logging.info("\n".join(os.listdir(filepath)))
-    # folders = [os.path.join(filepath, fld) for fld in os.listdir(filepath)]
+def move_file(filepath="."):
+    """Move files out of sub-directories of filepath, the current working directory by default."""
+    # The entry types come with the directory listing, no stat per entry
+    with os.scandir(filepath) as it:
+        folders = [entry.path for entry in it if entry.is_dir()]
     # logging.info(filepath + ":\n  " + "\n  ".join(folders))
-    folders = filter(os.path.isdir, os.listdir(u"."))
-    # logging.info("Sub-folders: ", u"\n".join(folders))
     for folder in folders:
-        files = [os.path.join(folder, fn) for fn in os.listdir(folder)]
-        files = filter(os.path.isfile, files)
-        for fn in files:
-            _, filename = os.path.split(fn)
-            shutil.move(fn, filename)
-        assert 0 == len(os.listdir(folder))
+        with os.scandir(folder) as it:
+            files = [entry for entry in it if entry.is_file()]
+        for entry in files:
+            shutil.move(entry.path, os.path.join(filepath, entry.name))
+        # Stops at the first entry left, the folder is not listed in full
+        with os.scandir(folder) as it:
+            assert next(it, None) is None, folder
+
+def _extract_archive(filename, dest):
+    """Extract an archive into dest in one pass.
+
+    Uses libarchive when python-libarchive-c is installed, which streams
+    the entries in C without forking a process per archive; otherwise
+    falls back to calling 7z.
+    """
+    try:
+        import libarchive
+    except ImportError:
+        libarchive = None
+    if libarchive is None:
+        subproc.call(["7z", "x", "-y", f"-o{dest}", filename], stdout=subproc.PIPE)
+        return
+    # Entries are written below dest directly, the working directory is left alone
+    with libarchive.file_reader(filename) as archive:
+        for entry in archive:
+            pathname = os.path.normpath(entry.pathname)
+            if (os.path.isabs(pathname) or pathname == os.pardir
+                    or pathname.startswith(os.pardir + os.sep)):
+                logging.warning(f"  Skipping unsafe path: {entry.pathname}")
+                continue
+            if entry.issym or entry.islnk:
+                # Links have no data blocks, they would become empty files
+                logging.warning(f"  Skipping link: {entry.pathname}")
+                continue
+            target = os.path.join(dest, pathname)
+            if entry.isdir:
+                os.makedirs(target, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as the_file:
+                for block in entry.get_blocks():
+                    the_file.write(block)
+
+def _extract_flat_libarchive(filename, dest):
+    """Extract files of an archive into dest, dropping paths.
+
+    Used for files that ZipFile cannot read, e.g., other archives with a
+    .zip suffix. Returns False if python-libarchive-c is not installed.
+    """
+    try:
+        import libarchive
+    except ImportError:
+        return False
+    with libarchive.file_reader(filename) as archive:
+        for entry in archive:
+            if entry.isdir:
+                logging.info(f"  Skipping directory: {entry.pathname}")
+                continue
+            if entry.pathname.find("__MACOSX") >= 0:
+                logging.info(f"  Skipping: {entry.pathname}")
+                continue
+            _, name_sys = os.path.split(entry.pathname)
+            with open(os.path.join(dest, name_sys), 'wb') as the_file:
+                for block in entry.get_blocks():
+                    the_file.write(block)
+    return True
 
 def extract_rar(filename):
     """Filename include path."""
-    cwd = os.getcwd()
-    filepath, filename = os.path.split(filename)
-    logging.info(f"Extracting {filename} in {filepath}")
-    os.chdir(filepath)
-    subproc.call(["7z", "x", "-y", filename], stdout=subproc.PIPE)
-    move_file()
-    os.chdir(cwd)
+    filepath, basename = os.path.split(filename)
+    filepath = filepath or "."
+    logging.info(f"Extracting {basename} in {filepath}")
+    _extract_archive(filename, filepath)
+    move_file(filepath)
 
 def extract_zip(filename):
     """Filename include path."""
-    code_pages = [u"ascii", u"utf-8", u"GB18030", u"GBK", u"GB2312", u"hz"]
-    cwd = os.getcwdu()
-    filepath, filename = os.path.split(filename)
-    os.chdir(filepath)
-    zip_obj = ZipFile(filename, 'r')
-    names = zip_obj.namelist()
-    logging.info(f"Extracting {filename} in {filepath}")
-    for name in names:
-        if name[-1] == "/" or os.path.isdir(name):
-            logging.info(f"  Skipping directory: {name}")
-            continue
-        if name.find("__MACOSX") >= 0:
-            logging.info(f"  Skipping: {name}")
-            continue
-        succeed = False
-        name_sys = name
-        for coding in code_pages:
-            try:
-                name_sys = name.decode(coding)
-                succeed = True
-            except:
-                succeed = False
-            if succeed:
-                break
-        _, name_sys = os.path.split(name_sys)
-        the_file = zip_obj.open(name, 'r')
-        contents = the_file.read()
-        the_file.close()
-        the_file = open(name_sys, 'w')
-        the_file.write(contents)
-        the_file.close()
-    zip_obj.close()
+    filepath, basename = os.path.split(filename)
+    filepath = filepath or "."
+    logging.info(f"Extracting {basename} in {filepath}")
+    # Names without the UTF-8 flag are mostly written by Chinese Windows,
+    # ZipFile decodes them as such where libarchive would garble them
+    try:
+        zip_obj = ZipFile(filename, 'r', metadata_encoding='gb18030')
+    except zipfile.BadZipFile:
+        if _extract_flat_libarchive(filename, filepath):
+            return
+        raise
+    with zip_obj:
+        for info in zip_obj.infolist():
+            name = info.filename
+            if info.is_dir():
+                logging.info(f"  Skipping directory: {name}")
+                continue
+            if name.find("__MACOSX") >= 0:
+                logging.info(f"  Skipping: {name}")
+                continue
+            _, name_sys = os.path.split(name)
+            with zip_obj.open(info, 'r') as src, open(os.path.join(filepath, name_sys), 'wb') as dst:
+                shutil.copyfileobj(src, dst, length=1024*1024)
     # move_file()
-    os.chdir(cwd)
 
 def check_local_homeworks(folders, scores):
     """Check local homeworks."""
-    re_id = re.compile(r'(?P<stuid>[0-9]{10,11})')
     for folder, sc in zip(folders, scores):
         files = glob.glob(folder + "/*/*.py")
         files += glob.glob(folder + "/*/*.ipynb")
         homeworks = dict()
         for filename in files:
-            m = re_id.search(filename)
+            m = _RE_STUID.search(filename)
             if m is not None:
                 stu_id = m.group('stuid')
                 homeworks[stu_id] = [sc]
@@ -163,21 +297,17 @@ def check_local_homeworks(folders, scores):
 
 def find_duplication(homework):
     """Find duplications in submitted homework."""
-    re_id = re.compile(r'(?P<stuid>[0-9]{10,11})')
-    dup_check = dict()
+    dup_check = defaultdict(list)
     with open(homework, 'r') as data:
-        lines = data.readlines()
-        for ln in lines:
+        for ln in data:
             dt = ln.split()
+            if len(dt) < 2:  # Skip blank or malformed lines
+                continue
             csum, right = dt[0], dt[1]
-            if csum not in dup_check:
-                dup_check[csum] = list()
-            m = re_id.search(right)
+            m = _RE_STUID.search(right)
             if m is not None:
-                stu_id = m.group('stuid')
-                dup_check[csum].append(stu_id)
-    dup_check = filter(lambda k, v: len(v) > 1, dup_check.items())
-    dup_check = [(key, sorted(val)) for key, val in dup_check]
+                dup_check[csum].append(m.group('stuid'))
+    dup_check = [(key, sorted(val)) for key, val in dup_check.items() if len(val) > 1]
     return dup_check
 
 def display_dup(dup_result):
@@ -200,30 +330,29 @@ def load_csv_to_dict(filename):
 
 def write_dict_to_csv(filename, data):
     """Write a dictionary to a CSV file with the key as the first column."""
-    with open(filename, 'w') as csvfile:
+    with open(filename, 'w', newline='', buffering=1 << 20) as csvfile:
         writer = csv.writer(csvfile)
-        keys = sorted(data.keys())
-        for key in keys:
-            value = data[key]
-            row = [str(key)] + [str(v) for v in value]
-            writer.writerow(row)
+        writer.writerows([str(key)] + [str(v) for v in data[key]]
+                         for key in sorted(data))
 
 def merge_csv(csv_files):
     """Merge CSV files based on keywords."""
-    results = dict()
-    data_all = list()
-    keys = set()
-    for filename in csv_files:
+    results, last_seen, fills = dict(), dict(), list()
+    for index, filename in enumerate(csv_files):
         data, row_len = load_csv_to_dict(filename)
-        keys |= set(data.keys())
-        data_all.append((data, row_len))
-    for key in keys:
-        values = list()
-        for value, row_len in data_all:
-            fill = ["0"]*row_len
-            dt = value[key] if key in value else fill
-            values.extend(dt)
-        results[key] = values
+        # The filler row of each file is shared by all missing keys
+        fills.append(["0"]*row_len)
+        # One pass over each file, the files a key is missing from are
+        # padded when the key shows up again or at the end
+        for key, values in data.items():
+            row = results.setdefault(key, [])
+            for fill in fills[last_seen.get(key, -1) + 1:index]:
+                row.extend(fill)
+            row.extend(values)
+            last_seen[key] = index
+    for key, row in results.items():
+        for fill in fills[last_seen[key] + 1:]:
+            row.extend(fill)
     return results
 
 def collect_figures_from_assignment(assignment_dir):
@@ -236,33 +365,74 @@ def collect_figures_from_assignment(assignment_dir):
     Returns:
         list: List of figure filenames found in the assignment directory.
     """
-    figures = []
-    for filename in os.listdir(assignment_dir):
-        if filename.endswith(('.png', '.jpg', '.jpeg', '.gif', '.pdf')):  # Add other image formats if needed
-            figures.append(filename)
-    return figures
+    return list(_list_figures(assignment_dir))
 
-def ensure_figures_available(assignment_dir, figures_dir, figures):
+@lru_cache(maxsize=None)
+def _list_figures(assignment_dir):
+    """List figure filenames in an assignment directory, cached per directory."""
+    with os.scandir(assignment_dir) as it:
+        return tuple(entry.name for entry in it
+                     if entry.name.lower().endswith(_FIGURE_EXTS) and entry.is_file())
+
+def ensure_figures_available(assignment_dir, figures_dir, figures, ensured=None):
     """
     Ensure that all required figures are available in the output directory.
     If a figure is missing, copy it from the assignment directory.
 
     Args:
         assignment_dir (str): Path to the original assignment directory.
-        output_dir (str): Path to the directory where the LaTeX file is being processed.
+        figures_dir (str): Path to the directory where the LaTeX file is being processed.
         figures (list): List of figure filenames required for the assignment.
+        ensured (set, optional): Directories already completed by the caller in
+            the same batch, which are not looked at again. Updated in place.
     """
     os.makedirs(figures_dir, exist_ok=True)
+    # Notebooks of one batch share their directories, which need a single look
+    key = (assignment_dir, figures_dir, tuple(figures))
+    if ensured is not None and key in ensured:
+        return
+    present = set(os.listdir(figures_dir))
 
     for figure in figures:
+        if figure in present:
+            continue
         figure_path = os.path.join(figures_dir, figure)
-        if not os.path.exists(figure_path):
-            source_path = os.path.join(assignment_dir, figure)
-            if os.path.exists(source_path):
-                logging.info(f"Copying missing figure '{figure}' from assignment directory.")
+        source_path = os.path.join(assignment_dir, figure)
+        if os.path.exists(source_path):
+            logging.info(f"Copying missing figure '{figure}' from assignment directory.")
+            # Figures are only read during compilation, so a hard link will do
+            try:
+                os.link(source_path, figure_path)
+            except OSError:
                 shutil.copy2(source_path, figure_path)
-            else:
-                logging.warning(f"Figure '{figure}' is missing and not found in assignment directory.")
+        else:
+            logging.warning(f"Figure '{figure}' is missing and not found in assignment directory.")
+    if ensured is not None:
+        ensured.add(key)
+
+_TRUNCATION_MARKER = '\n...[Output truncated due to length]...\n'
+
+def _truncate_text(text, max_lines):
+    """Keep the first and last max_lines/2 lines of text if it is longer than max_lines.
+
+    Only the newlines around the kept lines are located, so long outputs
+    are never split into a list of lines.
+    """
+    if text.count('\n') < max_lines:
+        return text
+    body = text[:-1] if text.endswith('\n') else text
+    if body.count('\n') < max_lines:
+        return text
+    half_lines = int(max_lines / 2)
+    head_end, tail_start = 0, len(body)
+    if half_lines > 0:
+        head_end = -1
+        for _ in range(half_lines):
+            head_end = body.find('\n', head_end + 1)
+        for _ in range(half_lines):
+            tail_start = body.rfind('\n', 0, tail_start)
+        tail_start += 1
+    return body[:head_end] + _TRUNCATION_MARKER + body[tail_start:]
 
 def truncate_long_outputs(nb, max_lines=128):
     """Truncates long outputs in a notebook object, keeping the first and last max_lines/2 lines.
@@ -271,96 +441,257 @@ def truncate_long_outputs(nb, max_lines=128):
         nb (nbformat.NotebookNode): The notebook object.
         max_lines (int): The maximum number of lines allowed for an output.
     """
-    half_lines = int(max_lines / 2)
     for cell in nb.cells:
         if cell.cell_type == 'code':
             for output in cell.outputs:
                 if 'text' in output:
                     if isinstance(output['text'], str):
-                        lines = output['text'].splitlines()
-                        if len(lines) > max_lines:
-                            output['text'] = '\n'.join(lines[:half_lines])
-                            output['text'] += '\n...[Output truncated due to length]...\n'
-                            output['text'] += '\n'.join(lines[-half_lines:])
+                        output['text'] = _truncate_text(output['text'], max_lines)
                 elif 'data' in output and 'text/plain' in output['data']:
                     if isinstance(output['data']['text/plain'], str):
-                        lines = output['data']['text/plain'].splitlines()
-                        if len(lines) > max_lines:
-                            output['data']['text/plain'] = '\n'.join(lines[:half_lines])
-                            output['data']['text/plain'] += '\n...[Output truncated due to length]...\n'
-                            output['data']['text/plain'] += '\n'.join(lines[-half_lines:])
+                        output['data']['text/plain'] = _truncate_text(output['data']['text/plain'], max_lines)
 
-def process_ipynb_submission(ipynb_file, student_name, student_id, assignment_title, assignment_dir, figures):
-    """Convert a single ipynb file to LaTeX format, compile to PDF, and ensure figures are available."""
+_NB_CONVERTER = None
 
-    try:
-        # Initialize NotebookConverter
-        converter = NotebookConverter()
+def _get_notebook_converter():
+    """Return a NotebookConverter shared by all submissions.
+
+    Building the converter loads the nbconvert templates from disk, so it
+    is created once on first use.
+    """
+    global _NB_CONVERTER
+    if _NB_CONVERTER is None:
+        _NB_CONVERTER = NotebookConverter()
+    return _NB_CONVERTER
 
-        # Move the unzipped file to the directory containing the input zip file
-        zip_dir = os.path.dirname(ipynb_file)
-        unzipped_file = os.path.basename(ipynb_file)
-        target_path = os.path.join(zip_dir, unzipped_file)
-        os.rename(ipynb_file, target_path)
+def prepare_ipynb_submission(ipynb_file, student_name, student_id, assignment_title, assignment_dir, figures,
+                             ensured=None):
+    """Set the metadata of a single ipynb file and convert it to LaTeX format.
 
-        # Set metadata for the notebook
+    ensured is passed on to ensure_figures_available().
+
+    Returns:
+        Path: The generated LaTeX file, or None if the conversion failed.
+    """
+    try:
+        converter = _get_notebook_converter()
+        # extract_ipynb_submission() already wrote the notebook to its final place
+        target_path = ipynb_file
+
+        # Set metadata for the notebook, patching the JSON directly since
+        # a full nbformat round-trip would validate every cell
         with open(target_path, 'r', encoding='utf-8') as f:
-            nb = nbformat.read(f, as_version=4)
-        if 'metadata' not in nb:
-            nb.metadata = {}
-        nb.metadata['title'] = assignment_title
-        nb.metadata['authors'] = [{"name": f"{student_name} (ID: {student_id})"}]
-        nb.metadata['date'] = ""
+            nb = json.load(f)
+        nb.setdefault('metadata', {}).update({
+            'title': assignment_title,
+            'authors': [{"name": f"{student_name} (ID: {student_id})"}],
+            'date': "",
+        })
         with open(target_path, 'w', encoding='utf-8') as f:
-            nbformat.write(nb, f)
+            json.dump(nb, f, ensure_ascii=False, indent=1)
 
-        # Convert to LaTeX
+        # Convert to LaTeX, the figures come from the assignment directory
         output_dir = os.path.dirname(target_path)
-        tex_file = converter.convert_notebook(target_path, output_dir, figures)
+        ensure_figures_available(assignment_dir, output_dir, figures, ensured)
+        return converter.convert_notebook(target_path)
 
-        if tex_file is None:
-            return None
+    except Exception as e:
+        logging.error(f"Error processing {ipynb_file}: {str(e)}")
+        return None
 
-        # Store current directory
-        original_dir = os.getcwd()
+@lru_cache(maxsize=None)
+def _tex_env():
+    """Environment for TeX runs with a persistent, shared TEXMFVAR.
 
-        try:
-            # Change to output directory for compilation
-            os.chdir(output_dir)
-            tex_basename = os.path.basename(tex_file)
+    Font and format caches written by one compilation are then reused by
+    all following ones instead of being regenerated. A TEXMFVAR set by the
+    user is respected.
+    """
+    env = os.environ.copy()
+    texmf_var = env.setdefault('TEXMFVAR', os.path.join(os.path.expanduser('~'), '.cache', 'xdufacool-texmf'))
+    os.makedirs(texmf_var, exist_ok=True)
+    return env
 
-            # Compile to PDF using latexmk
-            subprocess.run(
-                ['latexmk', '-pdfxe', '-quiet', tex_basename],
-                check=True,
-                stdout=subprocess.DEVNULL,  # Suppress standard output
-                stderr=subprocess.DEVNULL   # Suppress error output
-            )
+def compile_ipynb_tex(tex_file):
+    """Compile a converted notebook to PDF with tectonic or latexmk.
 
-            # Cleanup auxiliary files, excluding checkpoints
-            for ext in ['.aux', '.log', '.out']:
-                aux_file = tex_basename.replace('.tex', ext)
-                if os.path.exists(aux_file):
-                    os.remove(aux_file)
+    tectonic is preferred when installed since it keeps its format files
+    and package bundle cached across runs. Either compiler runs in the
+    directory of tex_file, so several compilations may run concurrently
+    without touching the working directory.
 
-            # Return the full path to the generated PDF
-            pdf_file = tex_basename.replace('.tex', '.pdf')
-            if os.path.exists(pdf_file):
-                pathfile = os.path.join(output_dir, pdf_file)
-                parent_dir = os.path.dirname(output_dir)
-                relpathfile = os.path.relpath(pathfile, parent_dir)
-                return relpathfile
+    Returns:
+        str: Path of the PDF relative to the parent of its directory, or None.
+    """
+    output_dir = os.path.dirname(tex_file)
+    tex_basename = os.path.basename(tex_file)
+    if shutil.which('tectonic'):
+        command = ['tectonic', '-X', 'compile', tex_basename]
+    else:
+        command = ['latexmk', '-pdfxe', '-quiet', tex_basename]
+    try:
+        # Compile to PDF
+        subprocess.run(
+            command,
+            cwd=output_dir or None,
+            env=_tex_env(),
+            check=True,
+            stdout=subprocess.DEVNULL,  # Suppress standard output
+            stderr=subprocess.DEVNULL   # Suppress error output
+        )
+    except Exception as e:
+        logging.error(f"Error compiling {tex_file}: {str(e)}")
+        return None
 
-        finally:
-            # Always return to original directory
-            os.chdir(original_dir)
+    return _collect_ipynb_pdf(tex_file)
 
-    except Exception as e:
-        logging.error(f"Error processing {ipynb_file}: {str(e)}")
+def compile_ipynb_texs(tex_files):
+    """Compile several converted notebooks with a single latexmk run.
+
+    latexmk changes into the directory of each file (-cd), so one process
+    handles the whole batch and its startup is paid only once. If any of
+    the files fails, each is compiled again on its own to find out which
+    ones did; up-to-date files are skipped by latexmk then. tectonic takes
+    one file per call, so it is run per file.
+
+    Returns:
+        list: The result of compile_ipynb_tex() for each file, in order.
+    """
+    if len(tex_files) < 2 or shutil.which('tectonic'):
+        return [compile_ipynb_tex(tex_file) for tex_file in tex_files]
+    command = ['latexmk', '-cd', '-pdfxe', '-quiet'] + [os.path.abspath(f) for f in tex_files]
+    try:
+        result = subprocess.run(command, env=_tex_env(),
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError as e:
+        logging.error(f"Error running latexmk: {e}")
+        return [None] * len(tex_files)
+    if result.returncode != 0:
+        return [compile_ipynb_tex(tex_file) for tex_file in tex_files]
+    return [_collect_ipynb_pdf(tex_file) for tex_file in tex_files]
+
+# Suffix of the file next to a PDF holding the digest of the notebook it was compiled from
+_DIGEST_SUFFIX = '.sha256'
+
+def _stamp_pdf(pdf_path, ipynb_file):
+    """Record the content digest of the notebook a PDF was compiled from."""
+    try:
+        digest = _notebook_digest(ipynb_file)
+        with open(pdf_path + _DIGEST_SUFFIX, 'w') as f:
+            f.write(digest)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Cannot record the digest of {ipynb_file}: {e}")
+
+def _collect_ipynb_pdf(tex_file):
+    """Remove the auxiliary files of a compiled notebook and locate its PDF.
+
+    Returns:
+        str: Path of the PDF relative to the parent of its directory, or None.
+    """
+    output_dir = os.path.dirname(tex_file)
+    tex_basename = os.path.basename(tex_file)
+    # Cleanup auxiliary files, excluding checkpoints
+    for ext in ['.aux', '.log', '.out']:
+        aux_file = os.path.join(output_dir, tex_basename.replace('.tex', ext))
+        if os.path.exists(aux_file):
+            os.remove(aux_file)
+
+    # Return the path to the generated PDF
+    pathfile = os.path.join(output_dir, tex_basename.replace('.tex', '.pdf'))
+    if os.path.exists(pathfile):
+        _stamp_pdf(pathfile, os.path.splitext(tex_file)[0] + '.ipynb')
+        parent_dir = os.path.dirname(output_dir)
+        return os.path.relpath(pathfile, parent_dir)
+    return None
+
+def _up_to_date_pdf(ipynb_file, assignment_dir, figures, digest=None):
+    """Find the PDF of a notebook compiled from its current content, newer than its figures.
+
+    The content digest of the notebook at compile time is kept next to the
+    PDF. Modification times of notebooks are not compared, since those
+    extracted from a resubmitted zip file may be older than the PDF.
+
+    Args:
+        digest (str, optional): The _notebook_digest() of ipynb_file, if known.
+
+    Returns:
+        str: Path of the PDF relative to the parent of its directory, or None
+            if it is missing or has to be compiled again.
+    """
+    pdf_path = os.path.splitext(ipynb_file)[0] + '.pdf'
+    try:
+        pdf_mtime = os.stat(pdf_path).st_mtime
+        with open(pdf_path + _DIGEST_SUFFIX, 'r') as f:
+            compiled_digest = f.read().strip()
+        if digest is None:
+            digest = _notebook_digest(ipynb_file)
+    except (OSError, ValueError):
+        return None
+    if compiled_digest != digest:
+        return None
+    for fig in figures:
+        try:
+            if pdf_mtime < os.stat(os.path.join(assignment_dir, fig)).st_mtime:
+                return None
+        except OSError:
+            pass  # Missing figures are reported by ensure_figures_available()
+    output_dir = os.path.dirname(pdf_path)
+    return os.path.relpath(pdf_path, os.path.dirname(output_dir))
+
+def process_ipynb_submission(ipynb_file, student_name, student_id, assignment_title, assignment_dir, figures):
+    """Convert a single ipynb file to LaTeX format, compile to PDF, and ensure figures are available.
+
+    The PDF is reused if it was compiled from the current notebook and is newer than the figures.
+    """
+    pdf_file = _up_to_date_pdf(ipynb_file, assignment_dir, figures)
+    if pdf_file:
+        logging.info(f"PDF of {ipynb_file} is up to date.")
+        return pdf_file
+    tex_file = prepare_ipynb_submission(ipynb_file, student_name, student_id,
+                                        assignment_title, assignment_dir, figures)
+    if tex_file is None:
         return None
+    return compile_ipynb_tex(tex_file)
+
+def _merge_manifest_digest(master_content, pdf_files, base_dir):
+    """Hash the master document with the size and mtime of every input PDF."""
+    sha256 = hashlib.sha256(master_content.encode('utf-8'))
+    for item in pdf_files:
+        try:
+            stat = os.stat(os.path.join(base_dir, item[0]))
+            stamp = f"{stat.st_size}:{stat.st_mtime_ns}"
+        except OSError:
+            stamp = "missing"
+        sha256.update(f"\n{item[0]}:{stamp}".encode('utf-8'))
+    return sha256.hexdigest()
+
+def _merge_pdfs_pypdf(title, pdf_files, output_pdf):
+    """Concatenate PDF files in-process, with one bookmark per student.
+
+    Input paths are relative to the directory of output_pdf, as for pdfpages.
+
+    Returns False if pypdf is not installed.
+    """
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        return False
+    base_dir = os.path.dirname(output_pdf)
+    writer = PdfWriter()
+    writer.add_metadata({'/Title': title})
+    for pdf_file, student_name, student_id, _ in pdf_files:
+        writer.append(os.path.join(base_dir, pdf_file),
+                      outline_item=f"{student_name} ({student_id})")
+    with open(output_pdf, 'wb') as f:
+        writer.write(f)
+    return True
 
 def merge_pdfs(title, pdf_files, output_pdf):
-    """Merge multiple PDF files into a single PDF using pdfpages."""
+    """Merge multiple PDF files into a single PDF.
+
+    The pages are copied with pypdf when it is installed, otherwise a master
+    document including them with pdfpages is typeset.
+    """
     try:
         # Create a master LaTeX document for merging PDFs
         master_content = r"""
@@ -384,16 +715,30 @@ def merge_pdfs(title, pdf_files, output_pdf):
             master_content += f"\\includepdf[pages=-,addtotoc={{1,section,1,{toc_title},sec:{student_id}}}]{{{pdf_file}}}\n"
 
         master_content += "\n\\end{document}"
-        
-        master_tex = output_pdf.replace(".pdf", ".tex")
-        with open(master_tex, 'w', encoding='utf-8') as f:
-            f.write(master_content)
-        subprocess.run(
-            ['latexmk', '-cd', '-interaction=nonstopmode', '-quiet', '-pdf', master_tex],
-            check=True,
-            stdout=subprocess.DEVNULL,  # Suppress standard output
-            stderr=subprocess.DEVNULL   # Suppress error output
-            )
+
+        # Skip typesetting if neither the master document nor any input changed
+        manifest_file = output_pdf + ".manifest"
+        digest = _merge_manifest_digest(master_content, pdf_files,
+                                        os.path.dirname(output_pdf))
+        if os.path.exists(output_pdf) and os.path.exists(manifest_file):
+            with open(manifest_file, 'r') as f:
+                if f.read().strip() == digest:
+                    logging.info(f"Merged PDF is up to date: {output_pdf}")
+                    return True
+
+        if not _merge_pdfs_pypdf(title, pdf_files, output_pdf):
+            master_tex = output_pdf.replace(".pdf", ".tex")
+            with open(master_tex, 'w', encoding='utf-8') as f:
+                f.write(master_content)
+            subprocess.run(
+                ['latexmk', '-cd', '-recorder', '-interaction=nonstopmode', '-quiet', '-pdf', master_tex],
+                env=_tex_env(),
+                check=True,
+                stdout=subprocess.DEVNULL,  # Suppress standard output
+                stderr=subprocess.DEVNULL   # Suppress error output
+                )
+        with open(manifest_file, 'w') as f:
+            f.write(digest + "\n")
         logging.info(f"Created merged PDF: {output_pdf}")
         return True
         
@@ -401,32 +746,118 @@ def merge_pdfs(title, pdf_files, output_pdf):
         logging.error(f"Error merging PDFs: {str(e)}")
         return False
 
-def process_ipynb_submissions(zip_file, assignment_dir, figures, merge=True):
-    """Process all ipynb submissions in a zip file."""
+_PARALLEL_MEMBERS = 8
+
+def _copy_members(zip_file, jobs):
+    """Write zip members to the given paths, concurrently for larger archives.
+
+    Each worker thread reads through its own ZipFile handle, so that the
+    seeks of members being decompressed at the same time never interfere.
+
+    Args:
+        zip_file (str): Path to the zip file.
+        jobs (list): (ZipInfo, target path) pairs in archive order.
+    """
+    def copy_member(zf, info, path):
+        with zf.open(info) as src, open(path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, length=1024*1024)
+
+    if len(jobs) < _PARALLEL_MEMBERS:
+        with ZipFile(zip_file, 'r') as zf:
+            for info, path in jobs:
+                copy_member(zf, info, path)
+        return
+
+    local, handles = threading.local(), []
+    def copy_job(job):
+        if not hasattr(local, 'zf'):
+            local.zf = ZipFile(zip_file, 'r')
+            handles.append(local.zf)
+        copy_member(local.zf, *job)
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1)) as executor:
+            list(executor.map(copy_job, jobs))
+    finally:
+        for zf in handles:
+            zf.close()
+
+def extract_ipynb_submission(zip_file):
+    """Extract a zip submission next to it, stripping the common leading path."""
     output_dir = os.path.dirname(zip_file)
     with ZipFile(zip_file, 'r') as zip_ref:
-        items = [
-            item for item in zip_ref.namelist() 
-            if not (item.endswith('/') or '@PaxHeader' in item or '__MACOSX' in item or '__pycache__' in item)
+        members = [
+            info for info in zip_ref.infolist()
+            if not (info.filename.endswith('/') or '@PaxHeader' in info.filename
+                    or '__MACOSX' in info.filename or '__pycache__' in info.filename)
         ]
-            
+        items = [info.filename for info in members]
+
         common_path = os.path.commonpath(items) if len(items) > 1 else os.path.dirname(items[0])
         # logging.info(f"Common path: {common_path}")
-        
-        for item in items:
-            item_wocp = os.path.relpath(item, common_path)
+
+        # Read members in archive order so the zip file is scanned sequentially
+        members.sort(key=lambda info: info.header_offset)
+        created_dirs, jobs = set(), []
+        # Member names use '/', so the paths are sliced rather than re-joined
+        prefix = os.path.join(output_dir, '')
+        common_len = len(common_path) + 1 if common_path else 0
+        for info in members:
+            item_wocp = info.filename[common_len:]
             if item_wocp.startswith('.'):
-                # item_path = os.path.join(output_dir, item)
-                logging.info(f"Skipping: {item}")
+                logging.info(f"Skipping: {info.filename}")
                 continue
 
-            zip_ref.extract(item, output_dir)
-            extracted_file_path = os.path.join(output_dir, item)
-            new_file_path = os.path.join(output_dir, item_wocp)
-            new_dir = os.path.dirname(new_file_path)
-            os.makedirs(new_dir, exist_ok=True)  # Create the directory if it doesn't exist
-            shutil.move(extracted_file_path, new_file_path)
-    
+            # Write the member straight to its final location
+            new_file_path = prefix + item_wocp
+            sub_dir = item_wocp.rpartition('/')[0]
+            new_dir = prefix + sub_dir if sub_dir else output_dir
+            if new_dir and new_dir not in created_dirs:
+                os.makedirs(new_dir, exist_ok=True)  # Create the directory if it doesn't exist
+                created_dirs.add(new_dir)
+            jobs.append((info, new_file_path))
+    _copy_members(zip_file, jobs)
+
+def _notebook_digest(ipynb_file):
+    """SHA-256 of a notebook's content with its metadata left out."""
+    with open(ipynb_file, 'r', encoding='utf-8') as f:
+        nb = json.load(f)
+    content = {key: value for key, value in nb.items() if key != 'metadata'}
+    canonical = json.dumps(content, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def process_ipynb_submissions(zip_file, assignment_dir, figures, merge=True, extract=True,
+                              notebook_owners=None):
+    """Process all ipynb submissions in a zip file.
+
+    Set extract to False if the zip file has already been extracted with
+    extract_ipynb_submission().
+
+    notebook_owners maps notebook digests to the first student submitting
+    them. Share one dict across the submissions of an assignment so that
+    notebooks identical to those of other students are reported.
+    """
+    if notebook_owners is None:
+        notebook_owners = dict()
+    jobs = prepare_ipynb_submissions(zip_file, assignment_dir, figures, notebook_owners, extract)
+    return compile_ipynb_submissions(jobs)
+
+def prepare_ipynb_submissions(zip_file, assignment_dir, figures, notebook_owners, extract=True):
+    """Convert the ipynb submissions in a zip file to LaTeX without compiling them.
+
+    Notebooks whose PDF was compiled from their current content and is newer
+    than the figures are not converted again. A notebook identical to one
+    of another student in notebook_owners is reported with a warning; it
+    is still compiled, since its PDF shows its own student.
+
+    Returns:
+        list: (tex_file, pdf_file, submission info) jobs, where tex_file is
+            None for the notebooks with an up-to-date pdf_file.
+    """
+    output_dir = os.path.dirname(zip_file)
+    if extract:
+        extract_ipynb_submission(zip_file)
+
     # Find all ipynb files, excluding checkpoints
     ipynb_files = []
     for root, dirs, files in os.walk(output_dir):
@@ -435,44 +866,71 @@ def process_ipynb_submissions(zip_file, assignment_dir, figures, merge=True):
                 ipynb_files.append(os.path.join(root, file))
     # Extract submission info from file path
     student_name, student_id, assignment_title = extract_submission_info(zip_file)
-    pdf_files = []    
+    info = (student_name, student_id, assignment_title)
+    jobs, ensured = [], set()
     for ipynb_file in ipynb_files:
+        digest = _notebook_digest(ipynb_file)
+        owner = notebook_owners.setdefault(digest, student_id)
+        if owner != student_id:
+            logging.warning(f"{ipynb_file} of {student_id} is identical to that of {owner}.")
+        pdf_file = _up_to_date_pdf(ipynb_file, assignment_dir, figures, digest)
+        if pdf_file:
+            logging.info(f"PDF of {ipynb_file} is up to date.")
+            jobs.append((None, pdf_file, info))
+            continue
         # Process the notebook with extracted info
-        # Create an instance of IpynbConverter
-        ipynb_converter = IpynbConverter(latex_converter)
-        pdf_file = ipynb_converter.convert_to_pdf(
+        tex_file = prepare_ipynb_submission(
             ipynb_file,
             student_name,
             student_id,
             assignment_title,
             assignment_dir,  # Pass assignment directory
-            figures  # Pass list of figures
+            figures,  # Pass list of figures
+            ensured
         )
+        if tex_file is not None:
+            jobs.append((tex_file, None, info))
+    return jobs
+
+def compile_ipynb_submissions(jobs):
+    """Compile the jobs of prepare_ipynb_submissions(), one compilation per CPU.
+
+    Returns:
+        list: (pdf_file, student_name, student_id, assignment_title) of every
+            notebook with a PDF, in the order of the jobs.
+    """
+    tex_files = [tex_file for tex_file, _, _ in jobs if tex_file is not None]
+    # latexmk is single-threaded, so run one batch of compilations per CPU
+    n_batches = min(os.cpu_count() or 1, len(tex_files))
+    batches = [tex_files[i::n_batches] for i in range(n_batches)]
+    compiled = dict()
+    with ThreadPoolExecutor(max_workers=max(n_batches, 1)) as executor:
+        for batch, pdf_files in zip(batches, executor.map(compile_ipynb_texs, batches)):
+            compiled.update(zip(batch, pdf_files))
+
+    pdf_files = []
+    for tex_file, pdf_file, info in jobs:
+        if tex_file is not None:
+            pdf_file = compiled[tex_file]
         if pdf_file:
-            pdf_files.append((pdf_file, student_name, student_id, assignment_title))
+            pdf_files.append((pdf_file,) + info)
     return pdf_files
 
 def extract_submission_info(zip_file):
     """Extract student ID, name and assignment info from file path."""
     basename = os.path.basename(zip_file)
-    basename_no_ext = os.path.splitext(basename)[0]  # Remove the file extension
-    parts = basename_no_ext.split('-')
-    
-    # Dictionary for homework titles
-    homework_titles = {
-        "HW24E01": "Linear Regression",
-        "HW24E02": "Logistic Regression",
-        "HW24E03": "Neural Networks",
-        "HW24E04": "Convolutional Neural Networks"
-    }
-    
-    # Retrieve title using the second part of the filename
-    hwid = parts[1] if len(parts) > 1 else "Unknown"
-    assignment_title = f"{homework_titles.get(hwid, 'Unknown')} ({hwid})"
-    
-    student_name = parts[3] if len(parts) > 3 else "Unknown"
-    student_id = parts[2] if len(parts) > 2 else "Unknown"
-    # logging.info(basename, parts)    
+    m = _RE_ZIP_NAME.match(basename)
+    if m is not None:
+        hwid = sys.intern(m.group('assignment_id'))
+        student_id, student_name = m.group('student_id'), m.group('student_name')
+    else:
+        parts = os.path.splitext(basename)[0].split('-')
+        hwid = sys.intern(parts[1]) if len(parts) > 1 else _UNKNOWN
+        student_id = parts[2] if len(parts) > 2 else _UNKNOWN
+        student_name = parts[3] if len(parts) > 3 else _UNKNOWN
+
+    # Retrieve title using the assignment ID in the filename
+    assignment_title = f"{_HOMEWORK_TITLES.get(hwid, _UNKNOWN)} ({hwid})"
     return student_name, student_id, assignment_title
 
 def clear_homework_path(assignment_id):
@@ -485,43 +943,44 @@ def clear_homework_path(assignment_id):
         int: Number of directories cleaned
     """
     # Find all directories matching the assignment pattern
-    assignment_dirs = glob.glob(f"MLEN-{assignment_id}/*")
+    base_dir = f"MLEN-{assignment_id}"
+    if not os.path.isdir(base_dir):
+        return 0
+    with os.scandir(base_dir) as it:
+        assignment_dirs = [entry.path for entry in it
+                           if entry.is_dir() and not entry.name.startswith('.')]
     cleaned_count = 0
-    
+
     for dir_path in assignment_dirs:
-        if not os.path.isdir(dir_path):
-            continue
-            
-        # Get all files and directories in the current path
-        for root, dirs, files in os.walk(dir_path, topdown=False):
-            # Remove all files except zip files
-            for file in files:
-                if not file.endswith('.zip'):
-                    file_path = os.path.join(root, file)
-                    try:
-                        os.remove(file_path)
-                    except OSError as e:
-                        logging.error(f"Error removing file {file_path}: {e}")
-            
-            # Remove all subdirectories
-            for dir_name in dirs:
-                dir_path = os.path.join(root, dir_name)
-                try:
-                    shutil.rmtree(dir_path)
-                except OSError as e:
-                    logging.error(f"Error removing directory {dir_path}: {e}")
-        
+        # Keep zip files at the top level: park them in a sibling directory,
+        # drop the whole tree in one rmtree and put the parked zips in its place
+        with os.scandir(dir_path) as it:
+            entries = list(it)
+        zips = [entry for entry in entries
+                if entry.name.endswith('.zip') and not entry.is_dir(follow_symlinks=False)]
+        if len(zips) < len(entries):
+            parked_dir = tempfile.mkdtemp(prefix='.', dir=base_dir)
+            try:
+                shutil.copymode(dir_path, parked_dir)
+                for entry in zips:
+                    os.rename(entry.path, os.path.join(parked_dir, entry.name))
+                shutil.rmtree(dir_path)
+                os.rename(parked_dir, dir_path)
+            except OSError as e:
+                logging.error(f"Error clearing {dir_path}, zip files are kept in {parked_dir}: {e}")
+
         cleaned_count += 1
-        
+
     return cleaned_count
 
 class StudentMapper:
+    uku_id_pattern = _RE_UKU
+    xidian_id_pattern = _RE_XIDIAN
+
     def __init__(self, mapping_csv, use_chinese_names=False):
         self.use_chinese_names = use_chinese_names
         self.student_map = self.load_student_mapping(mapping_csv)
         self.reverse_map = self.create_reverse_mapping()
-        self.uku_id_pattern = re.compile(r'(?P<uku_id>[hH][0-9]{8})')
-        self.xidian_id_pattern = re.compile(r'(?P<xidian_id>[0-9]{11}[xX]?)')
 
     def load_student_mapping(self, csv_file):
         """Load student mapping from CSV file."""
@@ -542,10 +1001,7 @@ class StudentMapper:
 
     def create_reverse_mapping(self):
         """Create a reverse mapping from Xidian ID to name."""
-        reverse_map = {}
-        for uku_id, (xidian_id, name) in self.student_map.items():
-            reverse_map[xidian_id] = name
-        return reverse_map
+        return {xidian_id: name for xidian_id, name in self.student_map.values()}
 
     def get_student_info(self, filename, directory):
         """Retrieve student info based on IDs found in filename or directory."""
@@ -570,8 +1026,13 @@ class StudentMapper:
             return match.group(0).upper()
         return None
 
-def formalize_homework_submissions(assignment_id, mapping_csv, use_chinese_names=False):
-    """Formalize homework submissions using student mapping.  Handles both zip and non-zip submissions."""
+def formalize_homework_submissions(assignment_id, mapping_csv, use_chinese_names=False,
+                                   link_mode='hardlink'):
+    """Formalize homework submissions using student mapping.  Handles both zip and non-zip submissions.
+
+    Formalized files are hard links to the submissions where possible, see
+    _link_or_copy for the meaning of link_mode.
+    """
     # Initialize the StudentMapper
     student_mapper = StudentMapper(mapping_csv)
 
@@ -581,49 +1042,43 @@ def formalize_homework_submissions(assignment_id, mapping_csv, use_chinese_names
 
     formalized_count = 0
 
-    for root, _, files in os.walk(base_dir):
-        for file in files:
-            full_path = os.path.join(root, file)
-            student_info = student_mapper.get_student_info(file, root)
+    for entry in _iter_files_parallel(base_dir):
+        file, root, full_path = entry.name, os.path.dirname(entry.path), entry.path
+        student_info = student_mapper.get_student_info(file, root)
 
-            if not student_info:
-                logging.warning(f"No mapping found for file: {file}")
-                continue
+        if not student_info:
+            logging.warning(f"No mapping found for file: {file}")
+            continue
 
-            xidian_id, english_name = student_info
-            student_dir = os.path.join(formalized_dir, xidian_id)
-            os.makedirs(student_dir, exist_ok=True)
+        xidian_id, english_name = student_info
+        student_dir = os.path.join(formalized_dir, xidian_id)
+        os.makedirs(student_dir, exist_ok=True)
 
-            if file.endswith(".zip"):
-                formalized_name = f"MLEN-{assignment_id}-{xidian_id}-{english_name}.zip"
-                dst_path = os.path.join(student_dir, formalized_name)
-                try:
-                    shutil.copy2(full_path, dst_path)
-                    formalized_count += 1
-                    logging.info(f"Formalized: {file} -> {formalized_name}")
-                except OSError as e:
-                    logging.error(f"Error copying {file}: {e}")
-            elif file.endswith((".pdf")):
-                formalized_name = f"MLEN-{assignment_id}-{xidian_id}-{english_name}.pdf"
-                dst_path = os.path.join(student_dir, formalized_name)
-                try:
-                    shutil.copy2(full_path, dst_path)
-                    formalized_count += 1
-                    logging.info(f"Formalized: {file} -> {formalized_name}")
-                except OSError as e:
-                    logging.error(f"Error copying {file}: {e}")
-            else:
-                logging.info(f"Skipping file {file} (not a zip or pdf)")
+        if file.endswith(".zip"):
+            formalized_name = f"MLEN-{assignment_id}-{xidian_id}-{english_name}.zip"
+            dst_path = os.path.join(student_dir, formalized_name)
+            try:
+                _link_or_copy(full_path, dst_path, link_mode)
+                formalized_count += 1
+                logging.info(f"Formalized: {file} -> {formalized_name}")
+            except OSError as e:
+                logging.error(f"Error copying {file}: {e}")
+        elif file.endswith((".pdf")):
+            formalized_name = f"MLEN-{assignment_id}-{xidian_id}-{english_name}.pdf"
+            dst_path = os.path.join(student_dir, formalized_name)
+            try:
+                _link_or_copy(full_path, dst_path, link_mode)
+                formalized_count += 1
+                logging.info(f"Formalized: {file} -> {formalized_name}")
+            except OSError as e:
+                logging.error(f"Error copying {file}: {e}")
+        else:
+            logging.info(f"Skipping file {file} (not a zip or pdf)")
 
     return formalized_count
 
 def generate_merged_submissions(assignments, base_dir):
     """Generate merged submissions for all formalized homeworks."""
-    directories = {"HW24E01": "regression",
-                   "HW24E02": "classification",
-                   "HW24E03": "neural-nets",
-                   "HW24E04": "conv-nets"}
-    
     for assignment_id in assignments:
         formalized_dir = os.path.join(base_dir, f"MLEN-{assignment_id}-formalized")
         if not os.path.exists(formalized_dir):
@@ -631,25 +1086,33 @@ def generate_merged_submissions(assignments, base_dir):
             continue
 
         # Collect figures from the assignment directory
-        assignment_dir = os.path.join("/home/fred/lectures/PRML/exercise", directories[assignment_id])
+        assignment_dir = os.path.join(_EXERCISES_ROOT, _ASSIGNMENT_DIRS[assignment_id])
         figures = collect_figures_from_assignment(assignment_dir)
 
-        # Process all zip files in the formalized directory
-        pdf_files = []
-        for root, _, files in os.walk(formalized_dir):
-            for file in files:
-                if file.endswith('.zip'):
-                    zip_path = os.path.join(root, file)
-                    submission_pdfs = process_ipynb_submissions(zip_path, assignment_dir, figures)
-                    if submission_pdfs:
-                        pdf_files.extend(submission_pdfs)
+        # Collect all zip files in the formalized directory
+        zip_paths = []
+        for entry in _iter_files_parallel(formalized_dir):
+            if entry.name.endswith('.zip'):
+                zip_paths.append(entry.path)
+        zip_paths.sort()  # The merged PDF and its manifest digest follow this order
+
+        # Extract them concurrently, zlib and file I/O release the GIL
+        with ThreadPoolExecutor() as executor:
+            list(executor.map(extract_ipynb_submission, zip_paths))
+
+        # Convert all notebooks first, then compile them of all students at once
+        jobs, notebook_owners = [], dict()
+        for zip_path in zip_paths:
+            jobs.extend(prepare_ipynb_submissions(zip_path, assignment_dir, figures,
+                                                  notebook_owners, extract=False))
+        pdf_files = compile_ipynb_submissions(jobs)
 
         if not pdf_files:
             logging.warning(f"No PDF files generated for {assignment_id}")
             continue
 
         # Merge all PDFs into a single file
-        title = f"MLEN-{assignment_id}: {directories[assignment_id].capitalize()}"
+        title = f"MLEN-{assignment_id}: {_ASSIGNMENT_DIRS[assignment_id].capitalize()}"
         output_pdf = os.path.join(formalized_dir, f"MLEN-{assignment_id}-merged.pdf")
         merge_pdfs(title, pdf_files, output_pdf)
         logging.info(f"Created merged PDF for {assignment_id}: {output_pdf}")
@@ -664,31 +1127,40 @@ def collect_reports(formalized_dir):
         list: A list of PDF file paths.  Returns an empty list if no suitable files are found.
     """
     report_files = []
-    for root, _, files in os.walk(formalized_dir):
-        for filename in files:
-            if filename.endswith(".pdf"):
-                filepath = os.path.join(root, filename)
-                parts = os.path.basename(filename).split("-")
-                student_id, student_name = parts[2], parts[3]
-                report_relpath = os.path.relpath(filepath, formalized_dir)
-                item = (report_relpath, student_name, student_id, "Report")
-                report_files.append(item)
-            elif filename.endswith(".zip"):
-                zip_filepath = os.path.join(root, filename)
-                parts = os.path.basename(filename).split("-")
-                student_id, student_name = parts[2], parts[3]
-                try:
-                    with ZipFile(zip_filepath, 'r') as zip_ref:
-                        for member in zip_ref.infolist():
-                            if member.filename.endswith(".pdf"):
-                                extracted_filepath = os.path.join(root, member.filename)
-                                zip_ref.extract(member, root)
-                                report_relpath = os.path.relpath(extracted_filepath, formalized_dir)
-                                item = (report_relpath, student_name, student_id, "Report")
-                                report_files.append(item)
-                                break  # Extract only the first PDF
-                except zipfile.BadZipFile as e:
-                    logging.error(f"Error decompressing zip file {zip_filepath}: {e}")
+    entries = sorted(_iter_files_parallel(formalized_dir), key=lambda entry: entry.path)
+    for entry in entries:
+        filename, root = entry.name, os.path.dirname(entry.path)
+        is_pdf = filename.endswith(".pdf")
+        if not is_pdf and not filename.endswith(".zip"):
+            continue  # Other files are not split into name parts
+        parts = os.path.splitext(filename)[0].split("-")
+        if len(parts) < 4:
+            continue  # Not a formalized name, e.g. a PDF extracted by an earlier run
+        if is_pdf:
+            filepath = entry.path
+            student_id, student_name = parts[2], parts[3]
+            report_relpath = os.path.relpath(filepath, formalized_dir)
+            item = (report_relpath, student_name, student_id, "Report")
+            report_files.append(item)
+        else:
+            zip_filepath = entry.path
+            student_id, student_name = parts[2], parts[3]
+            try:
+                with ZipFile(zip_filepath, 'r') as zip_ref:
+                    for member in zip_ref.infolist():
+                        if member.filename.endswith(".pdf"):
+                            extracted_filepath = os.path.join(root, member.filename)
+                            # An unchanged copy keeps its mtime, so merged PDFs stay up to date
+                            if (not os.path.isfile(extracted_filepath)
+                                    or os.path.getsize(extracted_filepath) != member.file_size
+                                    or os.path.getmtime(extracted_filepath) < entry.stat().st_mtime):
+                                extracted_filepath = zip_ref.extract(member, root)
+                            report_relpath = os.path.relpath(extracted_filepath, formalized_dir)
+                            item = (report_relpath, student_name, student_id, "Report")
+                            report_files.append(item)
+                            break  # Extract only the first PDF
+            except zipfile.BadZipFile as e:
+                logging.error(f"Error decompressing zip file {zip_filepath}: {e}")
     return report_files
 
 def process_zip_submission(zip_filepath):
@@ -704,7 +1176,7 @@ def process_zip_submission(zip_filepath):
     """
     # Extract information from the file name
     filename = os.path.basename(zip_filepath)
-    match = re.match(r"(?P<course_key>[A-Z]{4})-(?P<assignment_id>HW\d+[A-Z]\d+)-(?P<student_id>[0-9]{11}X?)-(?P<student_name>.+)\.zip", filename, re.IGNORECASE)
+    match = _RE_ZIP_NAME.match(filename)
     
     if not match:
         logging.error(f"Filename format is incorrect: {filename}")
@@ -736,8 +1208,7 @@ def process_zip_submission(zip_filepath):
                 # Coding assignment, process IPYNB
                 ipynb_file = ipynb_files[0]  # Assume first IPYNB is the relevant one
                 logging.info(f"Found IPYNB file for coding assignment: {ipynb_file}")
-                # Initialize NotebookConverter
-                converter = NotebookConverter()
+                converter = _get_notebook_converter()
                 metadata = {
                     'title': assignment_id,
                     'authors': [{"name": f"{student_name} (ID: {student_id})"}],
@@ -770,6 +1241,105 @@ def process_zip_submission(zip_filepath):
             shutil.rmtree(temp_dir)
             logging.info(f"Removed temporary directory: {temp_dir}")
 
+def _process_zip_submission(base_dir, submission_info, assignment_dir=None, figures=None):
+    """
+    Processes a zip submission: extracts contents, handles PDF and ipynb files.
+
+    Args:
+        base_dir (str): The base directory of the submissions.
+        submission_info (dict): Submission information.
+        assignment_dir (str, optional): The original assignment directory, by default
+                                        the assignment ID under the exercises root.
+        figures (list, optional): Figures of the assignment, collected from the
+                                  assignment directory if not given.
+
+    Returns:
+        dict: The submission information, pointing to the PDF if one is available.
+    """
+    zip_file = os.path.join(base_dir, submission_info["rel_path"])
+    extract_dir = os.path.splitext(zip_file)[0]  # Directory for extraction
+
+    try:
+        # Extract only the PDF and ipynb files, other contents are never used
+        extract_root = os.path.realpath(extract_dir)
+        pdf_files, ipynb_files = [], []
+        buckets = {".pdf": pdf_files, ".ipynb": ipynb_files}
+        with ZipFile(zip_file, "r") as zip_ref:
+            for info in zip_ref.infolist():
+                bucket = buckets.get(os.path.splitext(info.filename)[1].lower())
+                if bucket is None or info.is_dir() or '__MACOSX' in info.filename:
+                    continue
+                target = os.path.realpath(os.path.join(extract_root, info.filename))
+                if os.path.commonpath([extract_root, target]) != extract_root:
+                    logging.warning(f"Skipping unsafe path {info.filename} in {zip_file}")
+                    continue
+                bucket.append(zip_ref.extract(info, extract_dir))
+
+        if pdf_files:
+            # Use the first PDF found (if multiple, you might want to add logic)
+            submission_info["rel_path"] = os.path.relpath(pdf_files[0], base_dir)
+            submission_info["file_ext"] = ".pdf"
+        elif ipynb_files:
+            # Process ipynb files using process_ipynb_submission
+            if assignment_dir is None:
+                assignment_dir = os.path.join(_EXERCISES_ROOT, submission_info["assignment_id"])
+            if figures is None:
+                figures = collect_figures_from_assignment(assignment_dir)
+            pdf_file = process_ipynb_submission(
+                ipynb_files[0],
+                submission_info["student_name"],
+                submission_info["student_id"],
+                submission_info["assignment_id"],
+                assignment_dir,
+                figures,
+            )
+            if pdf_file:
+                submission_info["rel_path"] = os.path.relpath(pdf_file, base_dir)
+                submission_info["file_ext"] = ".pdf"
+
+    except Exception as e:
+        logging.error(f"Error processing zip submission {zip_file}: {e}")
+    return submission_info
+
+
+def _link_or_copy(src_path, dst_path, link_mode='hardlink'):
+    """Place a copy of src_path at dst_path as cheaply as the filesystem allows.
+
+    Args:
+        src_path (str): The source file.
+        dst_path (str): The destination file, replaced if it exists.
+        link_mode (str): 'hardlink' tries a hard link first, 'reflink' tries
+            copy_file_range (which shares extents on Btrfs/XFS), and 'copy'
+            always copies the data. Each mode falls back to the next one.
+    """
+    if os.path.exists(dst_path):
+        # A hard link made by an earlier run must not be truncated below
+        if os.path.samefile(src_path, dst_path):
+            return
+        os.remove(dst_path)
+    if link_mode == 'hardlink':
+        try:
+            os.link(src_path, dst_path)
+            return
+        except OSError:
+            pass
+    if link_mode in ('hardlink', 'reflink') and hasattr(os, 'copy_file_range'):
+        try:
+            with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+                remaining = os.fstat(src.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                shutil.copystat(src_path, dst_path)
+                return
+        except OSError:
+            pass
+    shutil.copy2(src_path, dst_path)
+
+
 class HomeworkManager:
     """
     Manages student homework submissions.
@@ -780,7 +1350,8 @@ class HomeworkManager:
     evaluation.
     """
 
-    def __init__(self, base_dir, course_id, mapping_csv=None, assignment_ids=None):
+    def __init__(self, base_dir, course_id, mapping_csv=None, assignment_ids=None,
+                 link_mode='hardlink', exercises_root=_EXERCISES_ROOT):
         """
         Initializes the HomeworkManager.
 
@@ -791,46 +1362,70 @@ class HomeworkManager:
                                       If None, student info will be extracted from filenames.
             assignment_ids (list, optional): List of specific assignment IDs to process.
                                           If None, processes all assignments.
+            link_mode (str, optional): How formalized submissions are created, one of
+                                     'hardlink', 'reflink' or 'copy'. Use 'copy' on
+                                     filesystems without link support, e.g., NFS.
+            exercises_root (str, optional): Directory containing the original assignments,
+                                          one subdirectory per assignment ID.
         """
         self.base_dir = base_dir
         self.course_id = course_id
         self.student_mapper = StudentMapper(mapping_csv) if mapping_csv else None
         self.assignment_ids = assignment_ids
+        self.link_mode = link_mode
+        self._manifest = self._load_manifest()
+        self._figure_cache = {}  # Figure filenames by assignment ID
+        self._exercises_root = exercises_root
+        self._assignment_dirs = {aid: os.path.join(exercises_root, aid)
+                                 for aid in (assignment_ids or [])}
         self.assignments = {}  # Dictionary to store submissions by assignment ID
         self.latex_converter = LaTeXConverter()
+        # Walked paths start with base_dir, so relative paths are plain slices
+        self._base_prefix = os.path.join(base_dir, '')
+        # Top-level directories to scan, e.g., MLEN-HW24E01
+        if assignment_ids:
+            ids = '|'.join(map(re.escape, assignment_ids))
+            self._top_re = re.compile(rf"{re.escape(course_id)}.*(?:{ids})")
 
     def collect_submissions(self):
         """
         Collects and organizes homework submissions from the base directory.
         Only processes directories that match the specified assignment IDs.
+
+        Submissions are sorted by assignment, student and newest first, so the
+        latest submission of each student is the first one of its group.
         """
-        # If no specific assignments are specified, scan all directories
-        if not self.assignment_ids:            
-            for root, _, files in os.walk(self.base_dir):
-                for file in files:
-                    submission_info = self.extract_submission_info(file, root)
-                    if submission_info:
-                        self.add_submission(submission_info)
+        submissions = []
+        for entry in self._iter_submission_files():
+            submission_info = self.extract_submission_info(entry)
+            if submission_info and self._should_process_assignment(submission_info["assignment_id"]):
+                submissions.append(self._relative_submission_info(submission_info))
+        submissions.sort(key=lambda s: (s["assignment_id"], s["student_id"], -s["timestamp"]))
+        for (assignment_id, student_id), group in groupby(
+                submissions, key=lambda s: (s["assignment_id"], s["student_id"])):
+            self.assignments.setdefault(assignment_id, {})[student_id] = next(group)
+            logging.info("Updated submission for %s in %s", student_id, assignment_id)
+        if self.assignment_ids:
+            logging.info(f"Processed submissions for assignments: {', '.join(self.assignment_ids)}")
+
+    def _iter_submission_files(self):
+        """
+        Yields os.DirEntry objects of the files to be checked for submissions.
+
+        If assignment IDs are specified, only the top-level directories whose
+        names start with the course ID and contain one of the assignment IDs
+        are scanned, otherwise the whole base directory is.
+        """
+        if not self.assignment_ids:
+            yield from _scandir_files(self.base_dir)
             return
 
-        # Process only directories containing specified assignment IDs
-        for assignment_id in self.assignment_ids:
-            # Use glob to find all directories containing the assignment ID
-            file_pattern = f"{self.base_dir}/{self.course_id}*{assignment_id}*/**"
-            logging.info(f"Searching for files matching pattern: {file_pattern}")
-            submission_files = glob.glob(file_pattern, recursive=True)
-            for file_path in submission_files:
-                if not os.path.isfile(file_path):
-                    continue
-                logging.info(f"Processing {file_path}")
-                filename = os.path.basename(file_path)
-                root = os.path.dirname(file_path)
-                submission_info = self.extract_submission_info(filename, root)
-                logging.info(f"    {submission_info}")
-                if submission_info and submission_info["assignment_id"] == assignment_id:
-                    self.add_submission(submission_info)
-                        
-            logging.info(f"Processed submissions for assignment: {assignment_id}")
+        with os.scandir(self.base_dir) as it:
+            top_dirs = [entry.path for entry in it
+                        if entry.is_dir() and self._top_re.match(entry.name)]
+        for top_dir in top_dirs:
+            logging.info(f"Searching for files in {top_dir}")
+            yield from _scandir_files(top_dir)
 
     def _should_process_assignment(self, assignment_id):
         """
@@ -844,24 +1439,26 @@ class HomeworkManager:
         """
         return self.assignment_ids is None or assignment_id in self.assignment_ids
 
-    def extract_submission_info(self, filename, root):
+    def extract_submission_info(self, entry):
         """
         Extracts submission information from a file.
 
         Args:
-            filename (str): The name of the file.
-            root (str): The root directory containing the file.
+            entry (os.DirEntry): The directory entry of the file.
 
         Returns:
             dict: Submission information or None if invalid
         """
-        file_path = os.path.join(root, filename)
-        file_ext = os.path.splitext(filename)[1].lower()
+        filename, file_path = entry.name, entry.path
+        root = os.path.dirname(file_path)
+        stem, dot, suffix = filename.rpartition('.')
+        file_ext = f".{suffix.lower()}" if dot and stem else ""
         
         # Skip non-submission files
         if not self._is_valid_submission(filename, file_ext):
             return None
-        logging.info(f"Processing file: {filename}")
+        # Called for every file, so formatting is left to the enabled handlers
+        logging.info("Processing file: %s", filename)
         # Extract assignment ID from filename or directory structure
         assignment_id = self._extract_assignment_id(filename, root)
         if not assignment_id:
@@ -870,7 +1467,7 @@ class HomeworkManager:
         # Get student information
         student_id, student_name = self.get_student_info(filename, root)
         if not student_id or not student_name:
-            logging.warning(f"Could not identify student for file: {filename}")
+            logging.warning("Could not identify student for file: %s", filename)
             return None
 
         return {
@@ -879,7 +1476,8 @@ class HomeworkManager:
             "assignment_id": assignment_id,
             "student_id": student_id,
             "student_name": student_name,
-            "filename": filename
+            "filename": filename,
+            "timestamp": entry.stat().st_mtime
         }
 
     def add_submission(self, submission_info):
@@ -893,12 +1491,7 @@ class HomeworkManager:
         """
         assignment_id = submission_info["assignment_id"]
         student_id = submission_info["student_id"]
-        file_path = submission_info["file_path"]
-        
-        # Convert absolute path to relative path and remove file_path
-        submission_info["rel_path"] = os.path.relpath(file_path, self.base_dir)
-        submission_info["timestamp"] = os.path.getmtime(file_path)
-        del submission_info["file_path"]
+        submission_info = self._relative_submission_info(submission_info)
 
         # Initialize assignment dictionary if it doesn't exist
         if assignment_id not in self.assignments:
@@ -910,6 +1503,23 @@ class HomeworkManager:
             self.assignments[assignment_id][student_id] = submission_info
             logging.info(f"Updated submission for {student_id} in {assignment_id}")
 
+    def _relative_submission_info(self, submission_info):
+        """
+        Replaces the file path of a submission with its path relative to base_dir.
+
+        Args:
+            submission_info (dict): Information about the submission
+
+        Returns:
+            dict: The same submission information with rel_path instead of file_path
+        """
+        file_path = submission_info.pop("file_path")
+        if file_path.startswith(self._base_prefix):
+            submission_info["rel_path"] = file_path[len(self._base_prefix):]
+        else:
+            submission_info["rel_path"] = os.path.relpath(file_path, self.base_dir)
+        return submission_info
+
     def get_absolute_path(self, submission_info):
         """
         Gets the absolute path for a submission.
@@ -925,75 +1535,96 @@ class HomeworkManager:
     def extract_and_process_submissions(self):
         """
         Extracts zip files and processes their contents (PDF or ipynb).
+
+        Submissions are processed in parallel in separate processes and the
+        updated submission information is stored back into the assignments.
         """
-        for assignment_id, students in self.assignments.items():
-            for student_id, submission_info in students.items():
-                if submission_info["file_ext"] == ".zip":
-                    self.process_zip_submission(submission_info)
+        with ProcessPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+            futures = {
+                executor.submit(_process_zip_submission, self.base_dir, submission_info,
+                                self._assignment_dir(assignment_id),
+                                self._assignment_figures(assignment_id)):
+                    (assignment_id, student_id)
+                for assignment_id, students in self.assignments.items()
+                for student_id, submission_info in students.items()
+                if submission_info["file_ext"] == ".zip"
+            }
+            for future in as_completed(futures):
+                assignment_id, student_id = futures[future]
+                self.assignments[assignment_id][student_id] = future.result()
 
     def process_zip_submission(self, submission_info):
         """
         Processes a zip submission: extracts contents, handles PDF and ipynb files.
 
         Args:
-            submission_info (dict): Submission information.
+            submission_info (dict): Submission information, updated in place.
         """
-        zip_file = os.path.join(self.base_dir, submission_info["rel_path"])
-        extract_dir = os.path.splitext(zip_file)[0]  # Directory for extraction
+        assignment_id = submission_info["assignment_id"]
+        submission_info.update(_process_zip_submission(
+            self.base_dir, submission_info,
+            self._assignment_dir(assignment_id), self._assignment_figures(assignment_id)))
 
-        try:
-            with ZipFile(zip_file, "r") as zip_ref:
-                zip_ref.extractall(extract_dir)
-
-            # Look for PDF or ipynb files in the extracted directory
-            extracted_files = []
-            for root, _, files in os.walk(extract_dir):
-                for file in files:
-                    extracted_files.append(os.path.join(root, file))
-
-            pdf_files = [f for f in extracted_files if f.lower().endswith(".pdf")]
-            ipynb_files = [
-                f for f in extracted_files if f.lower().endswith(".ipynb")
-            ]
-
-            if pdf_files:
-                # Use the first PDF found (if multiple, you might want to add logic)
-                submission_info["rel_path"] = os.path.relpath(pdf_files[0], self.base_dir)
-                submission_info["file_ext"] = ".pdf"
-            elif ipynb_files:
-                # Process ipynb files using process_ipynb_submission
-                assignment_dir = os.path.join(
-                    "/home/fred/lectures/PRML/exercise",
-                    submission_info["assignment_id"],
-                )
-                figures = collect_figures_from_assignment(assignment_dir)
-                pdf_file = process_ipynb_submission(
-                    ipynb_files[0],
-                    submission_info["student_name"],
-                    submission_info["student_id"],
-                    submission_info["assignment_id"],
-                    assignment_dir,
-                    figures,
-                )
-                if pdf_file:
-                    submission_info["rel_path"] = os.path.relpath(pdf_file, self.base_dir)
-                    submission_info["file_ext"] = ".pdf"
+    def _assignment_dir(self, assignment_id):
+        """
+        Gets the original directory of an assignment under the exercises root.
+
+        Args:
+            assignment_id (str): The assignment ID.
 
-        except Exception as e:
-            logging.error(f"Error processing zip submission {zip_file}: {e}")
+        Returns:
+            str: Path to the assignment directory.
+        """
+        assignment_dir = self._assignment_dirs.get(assignment_id)
+        if assignment_dir is None:
+            assignment_dir = os.path.join(self._exercises_root, assignment_id)
+            self._assignment_dirs[assignment_id] = assignment_dir
+        return assignment_dir
+
+    def _assignment_figures(self, assignment_id):
+        """
+        Gets the figures of an assignment, listing its directory only once.
+
+        The list is collected here rather than in the worker processes, whose
+        caches are not shared.
+
+        Args:
+            assignment_id (str): The assignment ID.
+
+        Returns:
+            list: Figure filenames, empty if the assignment directory is missing.
+        """
+        figures = self._figure_cache.get(assignment_id)
+        if figures is None:
+            assignment_dir = self._assignment_dir(assignment_id)
+            try:
+                figures = collect_figures_from_assignment(assignment_dir)
+            except OSError as e:
+                logging.warning(f"Could not collect figures from {assignment_dir}: {e}")
+                figures = []
+            self._figure_cache[assignment_id] = figures
+        return figures
 
     def organize_submissions(self):
         """
         Organizes submissions into a formalized directory structure.
+
+        Submissions are linked or copied concurrently since the work is I/O bound.
         """
-        for assignment_id, students in self.assignments.items():
-            for student_id, submission_info in students.items():
-                self.formalize_submission(submission_info)
+        submissions = [submission_info
+                       for students in self.assignments.values()
+                       for submission_info in students.values()]
+        with ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) * 2)) as executor:
+            list(executor.map(self.formalize_submission, submissions))
+        self._save_manifest()
 
     def formalize_submission(self, submission_info):
         """
         Copies a single submission to the formalized directory structure.
 
+        The submission is skipped if it is already formalized and its size and
+        modification time match the manifest of the previous run.
+
         Args:
             submission_info (dict): Submission information.
         """
@@ -1001,7 +1632,7 @@ class HomeworkManager:
         student_id = submission_info["student_id"]
         student_name = submission_info["student_name"]
         file_ext = submission_info["file_ext"]
-        src_path = submission_info["file_path"]
+        src_path = self.get_absolute_path(submission_info)
 
         formalized_dir = os.path.join(
             self.base_dir, f"{self.course_id}-{assignment_id}-formalized"
@@ -1015,11 +1646,45 @@ class HomeworkManager:
         dst_path = os.path.join(student_dir, formalized_name)
 
         try:
-            shutil.copy2(src_path, dst_path)
+            st = os.stat(src_path)
+            stamp = [int(st.st_mtime), st.st_size]
+            rel_path = submission_info["rel_path"]
+            if os.path.exists(dst_path) and self._manifest["files"].get(rel_path) == stamp:
+                logging.debug(f"Up to date: {dst_path}")
+                return
+            _link_or_copy(src_path, dst_path, self.link_mode)
+            self._manifest["files"][rel_path] = stamp
             logging.info(f"Formalized: {src_path} -> {dst_path}")
         except OSError as e:
             logging.error(f"Error copying {src_path}: {e}")
 
+    def _load_manifest(self):
+        """
+        Loads the manifest of formalized files and merged PDFs of the previous run.
+
+        Returns:
+            dict: {"files": {rel_path: [mtime, size]}, "merged": {output_name: digest}}
+        """
+        manifest = {"files": {}, "merged": {}}
+        try:
+            with open(os.path.join(self.base_dir, _MANIFEST_NAME), 'r') as f:
+                manifest.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        return manifest
+
+    def _save_manifest(self):
+        """
+        Saves the manifest under the base directory, replacing it atomically.
+        """
+        manifest_file = os.path.join(self.base_dir, _MANIFEST_NAME)
+        try:
+            with open(manifest_file + ".tmp", 'w') as f:
+                json.dump(self._manifest, f)
+            os.replace(manifest_file + ".tmp", manifest_file)
+        except OSError as e:
+            logging.error(f"Error saving manifest {manifest_file}: {e}")
+
     def get_student_info(self, filename, root):
         """
         Gets student information from mapping, filename, or directory path.
@@ -1033,31 +1698,22 @@ class HomeworkManager:
         """
         # Try student mapper first if available
         if self.student_mapper:
-            student_id, student_name = self.student_mapper.get_student_info(filename)
-            if student_id and student_name:
-                return student_id, student_name
+            student_info = self.student_mapper.get_student_info(filename, root)
+            if student_info:
+                return student_info
 
-        # Try to extract from filename
-        try:
-            parts = filename.split('-')
-            logging.info(f"    {parts}")
-            if len(parts) >= 2:
-                student_id = parts[-2]
-                student_name = os.path.splitext(parts[-1])[0]
-                if self._is_valid_student_id(student_id):
-                    return student_id, student_name
-        except Exception:
-            pass
+        # Try to extract from filename, the name follows the student ID
+        m = _RE_SID.search(filename)
+        if m is not None:
+            student_name = os.path.splitext(filename[m.end():])[0].lstrip('-')
+            if student_name:
+                return m.group(0), student_name
 
         # Fall back to directory path
-        try:
-            # Assuming directory structure like ".../COURSEID-HWID/STUDENTID/..."
-            path_parts = root.split(os.path.sep)
-            for part in path_parts:
-                if self._is_valid_student_id(part):
-                    return part, "NoName"
-        except Exception as e:
-            logging.warning(f"Could not extract student info from path {root}: {e}")
+        # Assuming directory structure like ".../COURSEID-HWID/STUDENTID/..."
+        for part in root.split(os.path.sep):
+            if self._is_valid_student_id(part):
+                return part, "NoName"
 
         return None, None
 
@@ -1072,8 +1728,8 @@ class HomeworkManager:
             bool: True if it looks like a valid student ID
         """
         # Adjust this pattern based on your student ID format
-        # Example: 8-10 digits
-        return bool(re.match(r'^\d{8,11}$', student_id))
+        # Example: 8-11 digits
+        return _RE_SID.fullmatch(student_id) is not None
 
     def _extract_assignment_id(self, filename, root):
         """
@@ -1087,32 +1743,16 @@ class HomeworkManager:
             str: Assignment ID or None if not found
         """
         # Try to get from filename first
-        try:
-            parts = filename.split('-')
-            if len(parts) >= 2:
-                # Look for pattern like 'HW24A01' in filename
-                for part in parts:
-                    if re.match(r'HW\d+[A-Z]\d+', part):
-                        return part
-        except Exception:
-            pass
-
-        # Fall back to directory path
-        try:
-            # Assuming directory structure like ".../COURSEID-HWID/..." or ".../HWID/..."
-            path_parts = root.split(os.path.sep)
-            for part in path_parts:
-                if '-' in part:
-                    # Try to find assignment ID in directory name
-                    dir_parts = part.split('-')
-                    for dir_part in dir_parts:
-                        if re.match(r'HW\d+[A-Z]\d+', dir_part):
-                            return dir_part
-                elif re.match(r'HW\d+[A-Z]\d+', part):
-                    return part
-        except Exception as e:
-            logging.warning(f"Could not extract assignment ID from path {root}: {e}")
-        
+        m = _RE_HW_ID.search(filename)
+        if m:
+            return m.group(0)
+
+        # Fall back to the directory path like ".../COURSEID-HWID/..." or
+        # ".../HWID/...", the assignment directory is usually close to the file
+        for part in reversed(root.split(os.sep)):
+            m = _RE_HW_ID.search(part)
+            if m:
+                return m.group(0)
         return None
 
     def _is_valid_submission(self, filename, file_ext):
@@ -1128,54 +1768,89 @@ class HomeworkManager:
         """
         # This is a placeholder implementation. You might want to implement
         # a more robust check based on your specific requirements.
-        return file_ext in [".zip", ".pdf", ".ipynb"]
+        return file_ext in _SUBMISSION_EXTS
 
     def merge_assignment_pdfs(self):
         """
         Merges all PDF submissions for each assignment into a single PDF file.
         Uses LaTeXConverter for template rendering and PDF generation.
-        """
-        for assignment_id, students in self.assignments.items():
-            pdf_files = []
-            for student_id in sorted(students.keys()):  # Sort by student ID
-                student_info = students[student_id]
-                if student_info["file_ext"].lower() == ".pdf":
-                    pdf_files.append((
-                        student_info["rel_path"],
-                        student_info["student_name"],
-                        student_id
-                    ))
-
-            if not pdf_files:
-                logging.warning(f"No PDF files found for assignment {assignment_id}")
-                continue
 
-            # Render template and compile PDF
-            output_name = f"{self.course_id}-{assignment_id}-merged"
-            
-            try:
-                latex_content = self.latex_converter.render_template(
-                    'pdfmerge.tex.j2',
-                    course_id=self.course_id,
-                    assignment_id=assignment_id,
-                    date=date.today().strftime("%Y-%m-%d"),
-                    submissions=pdf_files  # Already sorted by student_id
-                )
-                with open(f"{output_name}.tex", "w") as f:
-                    f.write(latex_content)
-                pdf_path = self.latex_converter.compile_pdf(
-                    f"{output_name}.tex",
-                    self.base_dir,
-                    output_name
-                )
-                
+        Assignments are merged concurrently, each in its own LaTeX process.
+        """
+        today = date.today().strftime("%Y-%m-%d")
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+            futures = {
+                executor.submit(self._merge_assignment_pdf, assignment_id, students, today):
+                    assignment_id
+                for assignment_id, students in self.assignments.items()
+            }
+            for future in as_completed(futures):
+                assignment_id = futures[future]
+                try:
+                    pdf_path = future.result()
+                except Exception as e:
+                    logging.error(f"Error processing {assignment_id}: {e}")
+                    continue
                 if pdf_path:
                     logging.info(f"Successfully merged PDFs for {assignment_id} to {pdf_path}")
-                else:
-                    logging.error(f"Failed to merge PDFs for {assignment_id}")
-                    
-            except Exception as e:
-                logging.error(f"Error processing {assignment_id}: {e}")
+        self._save_manifest()
+
+    def _merge_assignment_pdf(self, assignment_id, students, today):
+        """
+        Merges the PDF submissions of one assignment into a single PDF file.
+
+        Compilation is skipped if the merged PDF exists and neither the
+        rendered document nor any of the submissions changed since it was
+        compiled. The date is left out of the comparison, so a merged PDF
+        is not compiled again on another day.
+
+        Args:
+            assignment_id (str): The assignment ID.
+            students (dict): Submission information keyed by student ID.
+            today (str): The compilation date shown on the title page.
+
+        Returns:
+            str: Path to the merged PDF file or None if merging failed.
+        """
+        pdf_files = [
+            (student_info["rel_path"], student_info["student_name"], student_id)
+            for student_id, student_info in sorted(students.items())  # Sort by student ID
+            if student_info["file_ext"].lower() == ".pdf"
+        ]
+
+        if not pdf_files:
+            logging.warning(f"No PDF files found for assignment {assignment_id}")
+            return None
+
+        output_name = f"{self.course_id}-{assignment_id}-merged"
+        output_pdf = os.path.join(self.base_dir, f"{output_name}.pdf")
+        def render(date):
+            return self.latex_converter.render_template(
+                'pdfmerge.tex.j2',
+                course_id=self.course_id,
+                assignment_id=assignment_id,
+                date=date,
+                submissions=pdf_files  # Already sorted by student_id
+            )
+
+        # Names and template changes alter the digest, the date does not
+        digest = _merge_manifest_digest(render(""), pdf_files, self.base_dir)
+        if os.path.exists(output_pdf) and self._manifest["merged"].get(output_name) == digest:
+            logging.info(f"Merged PDF is up to date: {output_pdf}")
+            return output_pdf
+
+        # Compile PDF next to the submissions
+        latex_content = render(today)
+        pdf_path = self.latex_converter.compile_pdf(
+            latex_content,
+            self.base_dir,
+            output_name
+        )
+        if pdf_path:
+            self._manifest["merged"][output_name] = digest
+        else:
+            logging.error(f"Failed to merge PDFs for {assignment_id}")
+        return pdf_path
 
 if __name__ == "__main__":
     pass
@@ -1,4 +1,5 @@
 import os
+import re
 import subprocess
 import logging
 import jinja2
@@ -7,6 +8,7 @@ import nbformat
 from nbconvert import LatexExporter
 from traitlets.config import Config
 from pathlib import Path
+from xdufacool.utils import latex_template_env
 
 
 class PDFCompiler:
@@ -37,11 +39,10 @@ class PDFCompiler:
         Returns:
             str: Path to generated PDF file or None if compilation failed
         """
-        original_cwd = os.getcwd()
         try:
             os.makedirs(output_dir, exist_ok=True)
-            os.chdir(output_dir)
-            
+            # The compiler runs in output_dir, the working directory is left alone
+            tex_file = os.path.abspath(tex_file)
             basename = Path(tex_file).stem
             success = True
 
@@ -49,6 +50,7 @@ class PDFCompiler:
             for i in range(self.max_runs):
                 result = subprocess.run(
                     [self.compiler, '-interaction=nonstopmode', '-halt-on-error', tex_file],
+                    cwd=output_dir,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
                     text=True
@@ -73,9 +75,6 @@ class PDFCompiler:
         except Exception as e:
             logging.error(f"Error in PDF compilation: {e}")
             return None
-            
-        finally:
-            os.chdir(original_cwd)
 
     def _clean_auxiliary_files(self, directory, basename):
         """
@@ -103,20 +102,9 @@ class LaTeXConverter:
         if template_dir is None:
             template_dir = os.path.join(os.path.dirname(__file__), 'templates')
             
-        self.template_loader = jinja2.FileSystemLoader(searchpath=template_dir)
-        self.template_env = jinja2.Environment(
-            loader=self.template_loader,
-            block_start_string=r'\BLOCK{',
-            block_end_string='}',
-            variable_start_string=r'\VAR{',
-            variable_end_string='}',
-            comment_start_string=r'\#{',
-            comment_end_string='}',
-            line_statement_prefix='%%',
-            line_comment_prefix='%#',
-            trim_blocks=True,
-            autoescape=False,
-        )
+        # Converters using the same templates share an environment and its compiled templates
+        self.template_env = latex_template_env(str(template_dir))
+        self.template_loader = self.template_env.loader
         self.compiler = PDFCompiler()
 
     def render_template(self, template_name, **context):
@@ -208,7 +196,11 @@ class NotebookConverter:
                 for filename, data in resources['outputs'].items():
                     with open(figures_dir / filename, 'wb') as f:
                         f.write(data)
-                    body = body.replace(filename, f'figures/{filename}')
+                # Point all figures to the figures directory in one pass over the body
+                if resources['outputs']:
+                    names = sorted(resources['outputs'], key=len, reverse=True)
+                    pattern = re.compile('|'.join(map(re.escape, names)))
+                    body = pattern.sub(lambda m: f'figures/{m.group(0)}', body)
 
             latex_file = output_dir / f"{ipynb_file.stem}.tex"
             with open(latex_file, 'w') as f:
@@ -242,6 +234,9 @@ class NotebookConverter:
         """
         def truncate_text(text):
             """Helper function to truncate text content."""
+            # Most outputs are short, counting newlines avoids splitting them
+            if text.count('\n') < self.max_output_lines:
+                return text
             lines = text.splitlines()
             if len(lines) > self.max_output_lines:
                 half_lines = self.max_output_lines // 2
@@ -14,9 +14,15 @@
 import re
 import sys
 import os.path
+import json
 import hashlib
 import imaplib
 import logging
+import threading
+import time
+from itertools import islice
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from email.header import Header
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
@@ -40,6 +46,110 @@ def load_and_hash(filename):
     return None
 
 
+def hash_file(filename):
+    """Calculate the SHA256 hash code of a file, reading it in chunks."""
+    with open(filename, 'rb') as the_file:
+        return hashlib.file_digest(the_file, 'sha256').hexdigest()
+
+
+def save_and_hash(filename, data, chunk_size=1 << 20):
+    """Write data to a file and calculate its SHA256 hash code in the same pass."""
+    sha256 = hashlib.sha256()
+    view = memoryview(data)
+    with open(filename, 'wb') as output_file:
+        for start in range(0, len(view), chunk_size):
+            chunk = view[start:start + chunk_size]
+            sha256.update(chunk)
+            output_file.write(chunk)
+    return sha256.hexdigest()
+
+
+class AttachmentStore:
+    """Checksums of the attachments saved below a homework folder.
+
+    The checksums are kept in a manifest, so that re-runs neither download
+    emails whose attachments are on disk nor write identical files twice.
+    Files with the same content are hard linked to each other.
+    """
+    manifest_name = '.attachments.json'
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.files = {}   # relative path -> [size, mtime_ns, sha256]
+        self.emails = {}  # email uid -> relative paths of its attachments
+        manifest = os.path.join(folder, self.manifest_name)
+        if os.path.exists(manifest):
+            with open(manifest, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.files, self.emails = data['files'], data['emails']
+        self.by_digest = {record[2]: relpath for relpath, record in self.files.items()}
+
+    def digest(self, relpath):
+        """Return the recorded checksum of a file if it is unchanged on disk."""
+        record = self.files.get(relpath)
+        if record is None:
+            return None
+        try:
+            st = os.stat(os.path.join(self.folder, relpath))
+        except OSError:
+            return None
+        if [st.st_size, st.st_mtime_ns] != record[:2]:
+            return None
+        return record[2]
+
+    def has_email(self, email_uid):
+        """Check whether all attachments of an email are saved and unchanged."""
+        relpaths = self.emails.get(email_uid)
+        return relpaths is not None and all(self.digest(rp) for rp in relpaths)
+
+    def save(self, relpath, data, overwrite=False, sha256=None):
+        """Save data to a file unless it already holds the same content.
+
+        The checksum of data is calculated unless it is given.
+
+        Returns:
+            tuple: The checksum of data, and whether the file holds data.
+        """
+        if sha256 is None:
+            sha256 = hashlib.sha256(data).hexdigest()
+        filename = os.path.join(self.folder, relpath)
+        if os.path.exists(filename):
+            if self.digest(relpath) == sha256:
+                return sha256, True
+            if not overwrite:
+                return sha256, False
+            # The file may be linked to another one
+            os.remove(filename)
+        source = self.by_digest.get(sha256)
+        try:
+            if source is None or self.digest(source) != sha256:
+                raise FileNotFoundError(source)
+            os.link(os.path.join(self.folder, source), filename)
+        except OSError:
+            with open(filename, 'wb') as output_file:
+                output_file.write(data)
+        st = os.stat(filename)
+        self.files[relpath] = [st.st_size, st.st_mtime_ns, sha256]
+        self.by_digest.setdefault(sha256, relpath)
+        return sha256, True
+
+    def add_email(self, email_uid, relpaths):
+        self.emails[email_uid] = list(relpaths)
+
+    def dump(self):
+        """Write the manifest, replacing the previous one atomically."""
+        os.makedirs(self.folder, exist_ok=True)
+        manifest = os.path.join(self.folder, self.manifest_name)
+        with open(manifest + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'files': self.files, 'emails': self.emails}, f, ensure_ascii=False)
+        os.replace(manifest + '.tmp', manifest)
+
+
+# _RE_STUDENT_ID = re.compile(r'(?P<stuid>[0-9xtXT]{9,12}|X{3,5})')
+_RE_STUDENT_ID = re.compile(r'(?P<stuid>H?[0-9]{8,11}X?)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
 def parse_subject(subject):
     """
     Check the text to retrieve the student ID.
@@ -51,16 +161,13 @@ def parse_subject(subject):
                 <num>   ::= [0-9]{4}
     <school> = 02 means a student of School of Electronic Engineering
     """
-    if not hasattr(parse_subject, 're_id'):
-        # parse_subject.re_id = re.compile(r'(?P<stuid>[0-9xtXT]{9,12}|X{3,5})')
-        parse_subject.re_id = re.compile(r'(?P<stuid>H?[0-9]{8,11}X?)', re.IGNORECASE)
     # if not hasattr(parse_subject, 'year'):
     #     parse_subject.year = re.compile(r'(?P<year>2020)')
     student_id, name = None, None
-    m = parse_subject.re_id.search(subject)
+    m = _RE_STUDENT_ID.search(subject)
     if m is not None:
         student_id = m.group('stuid')
-        name = subject[m.end('stuid') + 1:].split('-')[0]
+        name = subject[m.end('stuid') + 1:].partition('-')[0]
     # my = parse_subject.year.search(subject)
     # if m is not None and my is not None:
     #     if my.end('year') < m.end('stuid'):
@@ -83,11 +190,10 @@ class Homework():
         """Initialize static (shared) variables across all homework submissions."""
         exts_zip = ['.zip', '.tar.gz', '.tar', '.xz', '.7z', '.rar']
         exts = ['.c', '.cpp', '.m', '.py']
-        Homework.exts_sources = set(exts + exts_zip)
-        exts_zip = ['.zip', '.tar.gz', '.tar', '.xz', '.7z', '.rar']
+        Homework.exts_sources = frozenset(exts + exts_zip)
         exts = ['.pdf', '.doc', '.docx', '.ppt', '.pptx', '.odt', '.pages',
                 '.htm', '.html', '.md', '.tex']
-        Homework.exts_docs = set(exts + exts_zip)
+        Homework.exts_docs = frozenset(exts + exts_zip)
 
         Homework.name_teacher = name
         Homework.email_teacher = email
@@ -138,10 +244,14 @@ class Submission():
         self.latest_email_uid = None  # latest uid of the email
         self.student_id = None
         self.filenames = []
+        self.folders = set()
         self.info = dict()
         self.replied = set()
         self.body = None
         self.data = dict()
+        # Lines of the checksum table, files with the same content are all listed
+        self.checksums = dict()
+        self.exts = set()
         self.emails = list()
         self.responses = list()
         self.accs = list()
@@ -153,8 +263,17 @@ class Submission():
         for filename in os.listdir(hw_folder):
             pathname = os.path.join(hw_folder, filename)
             if os.path.isfile(pathname):
-                code, data = load_and_hash(pathname)
-                self.data[code] = filename
+                self.add_file(hash_file(pathname), filename)
+
+    def add_file(self, sha256, filename):
+        """Record a file of the submission along with its checksum."""
+        self.data[sha256] = filename
+        self.checksums[f"{sha256} {filename}"] = None
+        root, ext = os.path.splitext(filename.lower())
+        # Compressed tarballs have a double extension
+        if ext == '.gz' and root.endswith('.tar'):
+            ext = '.tar.gz'
+        self.exts.add(ext)
 
     def update(self, email_uid, header):
         """
@@ -174,12 +293,12 @@ class Submission():
             self.responses.append(email_uid)
             return
 
+        # The date is parsed once, the time of the latest email is kept in info
+        time_curr = MailHelper.get_datetime(header['date'])
         update_info = False
         if self.latest_email_uid is not None:
             # check email time
-            time_prev = self.info['time']
-            time_curr = MailHelper.get_datetime(header['date'])
-            tm_diff = time_curr - time_prev
+            tm_diff = time_curr - self.info['time']
             # newer mail received
             if tm_diff.total_seconds() > 0:
                 update_info = True
@@ -195,25 +314,52 @@ class Submission():
             self.info = dict(name=student_name)
             for key, value in header.items():
                 self.info[key] = value
-            self.info['time'] = MailHelper.get_datetime(header['date'])
+            self.info['time'] = time_curr
         return email_uid_prev
 
-    def save(self, body, attachments, homework, overwrite=False):
-        """Update homework and save attachments to disk."""
+    def save(self, body, attachments, homework, overwrite=False, store=None, email_uid=None,
+             digests=None):
+        """Update homework and save attachments to disk.
+
+        With an AttachmentStore, identical files are neither written again
+        nor stored twice, and the attachments are recorded for email_uid.
+        Checksums of the attachments calculated beforehand are given by digests.
+        """
+        # The student folder is made once per student, and with the homework folder if needed
         stu_path = os.path.join(homework.descriptor, self.student_id)
-        if not os.path.exists(stu_path):
-            os.mkdir(stu_path)
+        if stu_path not in self.folders:
+            os.makedirs(stu_path, exist_ok=True)
+            self.folders.add(stu_path)
+
+        if store is not None:
+            relpaths = []
+            if digests is None:
+                digests = [None] * len(attachments)
+            for (fn, data), sha256 in zip(attachments, digests):
+                relpath = os.path.join(self.student_id, fn)
+                sha256, saved = store.save(relpath, data, overwrite, sha256)
+                self.add_file(sha256, fn)
+                if saved:
+                    relpaths.append(relpath)
+                    self.filenames.append(os.path.join(stu_path, fn))
+            store.add_email(email_uid, relpaths)
+            return
 
         for fn, data in attachments:
-            sha256 = hashlib.sha256(data).hexdigest()
-            self.data[sha256] = fn
             filename = os.path.join(stu_path, fn)
             if overwrite or not os.path.exists(filename):
-                with open(filename, 'wb') as output_file:
-                    output_file.write(data)
-                    self.filenames.append(filename)
-                # checksum, _ = load_and_hash(filename)
-                # assert checksum == sha256
+                # Attachments are hashed while they are written out
+                sha256 = save_and_hash(filename, data)
+                self.filenames.append(filename)
+            else:
+                sha256 = hashlib.sha256(data).hexdigest()
+            self.add_file(sha256, fn)
+
+    def restore(self, store, email_uid):
+        """Update homework from the attachments of an email saved by an earlier run."""
+        for relpath in store.emails[email_uid]:
+            self.add_file(store.digest(relpath), os.path.basename(relpath))
+            self.filenames.append(os.path.join(store.folder, relpath))
 
     def eval_submission(self, metric, leaderboard):
         if self.filenames:
@@ -256,16 +402,10 @@ class Submission():
             data['accuracy'] = self.info['accuracy']
             data['leaderboard'] = self.info['leaderboard']
 
-        exts, checksum = set(), list()
-        for sha, fn in self.data.items():
-            checksum.append(sha + ' ' + fn)
-            _, ext = os.path.splitext(fn)
-            exts.add(ext.lower())
-
-        data['checksum'] = '\n'.join(checksum)
+        data['checksum'] = '\n'.join(self.checksums)
 
-        has_source = len(exts & Homework.exts_sources) > 0
-        has_doc = len(exts & Homework.exts_docs) > 0
+        has_source = not self.exts.isdisjoint(Homework.exts_sources)
+        has_doc = not self.exts.isdisjoint(Homework.exts_docs)
         data['comment'] = '\n'
         if not has_doc:
             data['comment'] += u"\n！ 缺少作业附件。\n"
@@ -284,6 +424,16 @@ class Submission():
         print("\n".join(MailHelper.format_header(self.info, fields)))
 
 
+# Number of email headers requested by a single IMAP FETCH command
+_HEADER_BATCH = 100
+# Number of students whose emails are requested by a single IMAP FETCH command
+_EMAIL_BATCH = 8
+# Header fields read from submission emails, the others are not transferred
+_HEADER_FIELDS = ("SUBJECT", "FROM", "DATE", "MESSAGE-ID", "IN-REPLY-TO")
+# Servers drop connections idle for about 30 minutes, reused ones idle for longer than this are checked
+_IDLE_CHECK = 600
+
+
 class HomeworkManager:
     """The class for processing homework submitted via mail."""
 
@@ -316,6 +466,16 @@ class HomeworkManager:
         if 'proxy_ip' in cfg_general:
             proxy = cfg_general['proxy_ip'], cfg_general.getint('proxy_port')
         imap_server, smtp_server = cfg_email['imap_server'], cfg_email['smtp_server']
+        # Headers and emails are fetched over extra IMAP connections, one per
+        # worker thread, since an imaplib connection serves one thread only
+        self.workers = cfg_general.getint('workers', fallback=4)
+        # Servers limit the length of a command, fewer UIDs per FETCH may be needed
+        self.header_batch = cfg_general.getint('fetch_batch_size', fallback=_HEADER_BATCH)
+        self._reader_config = imap_server, proxy, cfg_email['password']
+        self._readers = threading.local()
+        self._reader_helpers = []
+        self._readers_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
         if self.testing:
             self.mail_helper = MailHelper(imap_server, proxy=proxy)
         else:
@@ -324,6 +484,75 @@ class HomeworkManager:
         self.mail_helper.login(Homework.email_teacher, cfg_email['password'])
         logging.info(f"  Logged in as {cfg_email['address']}.")
 
+    def _reader(self):
+        """Return the IMAP connection of the calling worker thread.
+
+        The connections are kept for all homeworks, and one idle for a while
+        is replaced if the server has dropped it.
+        """
+        helper = getattr(self._readers, 'helper', None)
+        now = time.monotonic()
+        if helper is not None and now - self._readers.used > _IDLE_CHECK and not helper.noop():
+            logging.debug("  Reconnecting a dropped IMAP connection.")
+            with self._readers_lock:
+                self._reader_helpers.remove(helper)
+            try:
+                helper.imapclient.logout()
+            except (imaplib.IMAP4.error, OSError):
+                pass
+            helper = None
+        if helper is None:
+            imap_server, proxy, password = self._reader_config
+            helper = MailHelper(imap_server, proxy=proxy)
+            helper.login(Homework.email_teacher, password)
+            helper.select(self.mail_label)
+            self._readers.helper = helper
+            with self._readers_lock:
+                self._reader_helpers.append(helper)
+        self._readers.used = now
+        return helper
+
+    def _fetch_headers(self, euids):
+        return self._reader().fetch_headers(euids, _HEADER_FIELDS)
+
+    def _as_completed(self, func, tasks, depth):
+        """Yield (task, func(task)) as they complete, running func for up to depth tasks at once.
+
+        A slow task only delays its own result, not those of the tasks after it.
+        """
+        tasks, pending = iter(tasks), {}
+        for task in islice(tasks, depth):
+            pending[self._executor.submit(func, task)] = task
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+            for task in islice(tasks, len(done)):
+                pending[self._executor.submit(func, task)] = task
+
+    def _header_cache(self, homework):
+        return os.path.join(homework.descriptor, '.headers.json')
+
+    def _load_headers(self, homework):
+        """Load the headers saved by an earlier run, if the mailbox UIDs are still valid."""
+        cache_file = self._header_cache(homework)
+        if not os.path.exists(cache_file):
+            return {}
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('uidvalidity') != self.mail_helper.uidvalidity():
+            logging.info(f"  UIDVALIDITY of {self.mail_label} changed, headers are fetched again.")
+            return {}
+        return cache['headers']
+
+    def _save_headers(self, homework, headers):
+        cache_file = self._header_cache(homework)
+        os.makedirs(homework.descriptor, exist_ok=True)
+        cache = {'uidvalidity': self.mail_helper.uidvalidity(), 'headers': headers}
+        with open(cache_file + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(cache_file + '.tmp', cache_file)
+
     def check_headers(self, homework):
         """Fetch email headers."""
         logging.debug(f"  Search {homework.conditions}")
@@ -331,8 +560,33 @@ class HomeworkManager:
         logging.debug(f"    {len(uids_email)} emails to be checked.")
         submissions = self.submissions.get(homework.descriptor, {})
         uids_pending = []
+        # Headers fetched by earlier runs are reused, only new emails are fetched
+        headers = self._load_headers(homework)
+        uids_new = [euid for euid in uids_email if euid not in headers]
+        logging.debug(f"    {len(uids_new)} headers to be fetched.")
+        # One FETCH command per batch of UIDs, the batches spread over the workers
+        size = self.header_batch
+        batches = [uids_new[i:i + size] for i in range(0, len(uids_new), size)]
+        for batch_headers in self._executor.map(self._fetch_headers, batches):
+            headers.update(batch_headers)
+        if uids_new:
+            self._save_headers(homework, headers)
+        # Copies of an email, with the same Message-ID, are processed once
+        message_ids = set()
+        # Flags are set by one STORE command per batch of emails
+        uids_seen, uids_answered = [], []
         for euid in uids_email:
-            header = self.mail_helper.fetch_header(euid)
+            header = headers.get(euid)
+            if header is None:
+                logging.warning(f'  {euid} header not retrieved.')
+                continue
+            message_id = header.get('message-id')
+            if message_id in message_ids:
+                logging.debug(f'  {euid} is a copy of {message_id}, skipped.')
+                uids_seen.append(euid)
+                continue
+            if message_id:
+                message_ids.add(message_id)
             student_id, _ = parse_subject(header['subject'])
             if student_id is None:
                 logging.warning(f'  {euid} {header["subject"]} {header["date"]}')
@@ -349,54 +603,116 @@ class HomeworkManager:
             logging.debug(f'  - update records of {student_id}...')
             euid_prev = submissions[student_id].update(euid, header)
             if euid_prev:                
-                self.mail_helper.flag(euid_prev, ['Seen', 'Answered'])
-                logging.debug(f"  - flagged {euid_prev} as answered.")
+                uids_answered.append(euid_prev)
+                logging.debug(f"  - flag {euid_prev} as answered.")
+        self._flag_all(uids_seen, ['Seen'])
+        self._flag_all(uids_answered, ['Seen', 'Answered'])
         self.submissions[homework.descriptor] = submissions
 
+    def _flag_all(self, euids, flags):
+        """Set flags of emails with one STORE command per batch of UIDs."""
+        size = self.header_batch
+        for i in range(0, len(euids), size):
+            self.mail_helper.flag(",".join(map(str, euids[i:i + size])), flags)
+
     def send_confirmation(self, homework):
         """Send confirmation to unreplied emails."""
         # TODO: batch mode attachments download
         submissions = self.submissions.get(homework.descriptor, {})        
-        queue_to_reply = []
+        queue_to_reply, uids_seen = [], []
         for student_id, hw in submissions.items():
             if not hw.is_confirmed():
                 queue_to_reply.append((student_id, hw))
             else:
-                for euid in hw.emails + hw.responses:
-                    self.mail_helper.flag(euid, ['Seen'])                    
+                uids_seen += hw.emails + hw.responses
+        self._flag_all(uids_seen, ['Seen'])
         logging.debug(f"    {len(queue_to_reply)} emails to be replied.")
 
+        downloads = []
         for student_id, hw in queue_to_reply:
             download_list = []
             if 'latest' == self.download:
                 download_list += [hw.latest_email_uid]
             elif 'all' == self.download:
                 download_list += hw.emails
-            print(download_list)
-            
-            for euid in download_list:
-                logging.debug(f"  {euid} {hw.info['subject']} ({hw.info['size'].strip()}) download started.")
+            downloads.append((student_id, hw, tuple(download_list)))
+
+        # Emails saved by an earlier run are not downloaded again
+        store = AttachmentStore(homework.descriptor)
+        to_fetch = set() if self.testing else {euid for _, _, euids in downloads
+                                                for euid in euids if not store.has_email(euid)}
+
+        def fetch(chunk):
+            """Fetch the emails of a chunk of students with one FETCH command."""
+            missing = [euid for _, _, euids in chunk for euid in euids if euid in to_fetch]
+            if not missing:
+                return {}
+            reader = self._reader()
+            messages = reader.fetch_emails(missing)
+            for euid in missing:
+                if euid not in messages:
+                    messages[euid] = reader.fetch_email(euid)
+            # Attachments are hashed here, hashlib releases the GIL for large data
+            return {euid: (body, attachments,
+                           [hashlib.sha256(data).hexdigest() for _, data in attachments])
+                    for euid, (body, attachments) in messages.items()}
+
+        # The workers download chunks of students, which are saved and confirmed in
+        # the order they arrive, so a slow download does not hold up the others.
+        # Only this thread writes to disk and the store.
+        chunks = [downloads[i:i + _EMAIL_BATCH] for i in range(0, len(downloads), _EMAIL_BATCH)]
+        fetched = ((job, messages) for chunk, messages in self._as_completed(fetch, chunks, self.workers)
+                   for job in chunk)
+        # Confirmations are sent by another thread, which is then the only user of
+        # the main connection, while the next submissions are saved and evaluated
+        sender, sent = ThreadPoolExecutor(max_workers=1), []
+        try:
+            for (student_id, hw, download_list), messages in fetched:
+                print(list(download_list))
+
+                for euid in download_list:
+                    logging.debug(f"  {euid} {hw.info['subject']} ({hw.info['size'].strip()}) download started.")
+                    if self.testing:
+                        logging.debug(f"  {euid} {hw.info['subject']} download to be finished.")
+                    elif euid not in messages:
+                        hw.restore(store, euid)
+                        logging.debug(f"  {euid} {hw.info['subject']} already downloaded.")
+                    else:
+                        # Attachments are released once saved, not with their whole chunk
+                        body, attachments, digests = messages.pop(euid)
+                        hw.save(body, attachments, homework, overwrite=True,
+                                store=store, email_uid=euid, digests=digests)
+                        logging.debug(f"  {euid} {hw.info['subject']} download finished.")
+
+                if hasattr(homework, 'metric') and not self.testing:
+                    hw.eval_submission(homework.metric, homework.leaderboard)
+                    if hw.accs:
+                        print(hw.student_id, max(hw.accs), len(hw.accs), len(hw.emails), sep=',')
+
                 if not self.testing:
-                    body, attachments = self.mail_helper.fetch_email(euid)
-                    hw.save(body, attachments, homework, overwrite=True)
-                    logging.debug(f"  {euid} {hw.info['subject']} download finished.")
+                    to_addr, msg = hw.create_confirmation()
+                    sent.append(sender.submit(self._confirm, hw.latest_email_uid,
+                                              hw.info['subject'], to_addr, msg))
                 else:
-                    logging.debug(f"  {euid} {hw.info['subject']} download to be finished.")
-
-            if hasattr(homework, 'metric') and not self.testing:
-                hw.eval_submission(homework.metric, homework.leaderboard)
-                if hw.accs:
-                    print(hw.student_id, max(hw.accs), len(hw.accs), len(hw.emails), sep=',')
-
+                    logging.debug(f"  {hw.latest_email_uid} {hw.info['subject']} to be confirmed.")
+        finally:
+            # The confirmations made so far are sent before leaving
+            sender.shutdown()
             if not self.testing:
-                to_addr, msg = hw.create_confirmation()
-                self.mail_helper.send_email(Homework.email_teacher, to_addr, msg)
-                self.mail_helper.flag(hw.latest_email_uid, ['Seen'])
-                logging.debug(f"  {hw.latest_email_uid} {hw.info['subject']} confirmation sent.")
-            else:
-                logging.debug(f"  {hw.latest_email_uid} {hw.info['subject']} to be confirmed.")
+                store.dump()
+        for future in sent:
+            future.result()
+
+    def _confirm(self, email_uid, subject, to_addr, msg):
+        """Send a confirmation and mark the submission email as seen."""
+        self.mail_helper.send_email(Homework.email_teacher, to_addr, msg)
+        self.mail_helper.flag(email_uid, ['Seen'])
+        logging.debug(f"  {email_uid} {subject} confirmation sent.")
 
     def quit(self):
+        self._executor.shutdown()
+        for helper in self._reader_helpers:
+            helper.quit()
         self.mail_helper.quit()
 
   
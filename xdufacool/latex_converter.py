@@ -3,6 +3,7 @@ import logging
 import subprocess
 from pathlib import Path
 import jinja2
+from xdufacool.utils import latex_template_env
 
 class LaTeXConverter:
     """
@@ -21,20 +22,9 @@ class LaTeXConverter:
         if template_dir is None:
             template_dir = os.path.join(os.path.dirname(__file__), 'templates')
             
-        self.template_loader = jinja2.FileSystemLoader(searchpath=template_dir)
-        self.template_env = jinja2.Environment(
-            loader=self.template_loader,
-            block_start_string=r'\BLOCK{',
-            block_end_string='}',
-            variable_start_string=r'\VAR{',
-            variable_end_string='}',
-            comment_start_string=r'\#{',
-            comment_end_string='}',
-            line_statement_prefix='%%',
-            line_comment_prefix='%#',
-            trim_blocks=True,
-            autoescape=False,
-        )
+        # Converters using the same templates share an environment and its compiled templates
+        self.template_env = latex_template_env(str(template_dir))
+        self.template_loader = self.template_env.loader
 
     def render_template(self, template_name, **context):
         """
@@ -63,20 +53,19 @@ class LaTeXConverter:
         Returns:
             str: Path to generated PDF file or None if compilation failed
         """
-        original_cwd = os.getcwd()
         try:
             os.makedirs(output_dir, exist_ok=True)
-            os.chdir(output_dir)
 
             # Write LaTeX content to file
             tex_file = f"{output_name}.tex"
-            with open(tex_file, 'w', encoding='utf-8') as f:
+            with open(os.path.join(output_dir, tex_file), 'w', encoding='utf-8') as f:
                 f.write(tex_content)
 
             # Compile twice for TOC
             for i in range(2):
                 result = subprocess.run(
                     ['xelatex', '-interaction=nonstopmode', '-halt-on-error', tex_file],
+                    cwd=output_dir,
                     stdout=subprocess.DEVNULL,
                     stderr=subprocess.PIPE,
                     text=True
@@ -104,9 +93,6 @@ class LaTeXConverter:
         except Exception as e:
             logging.error(f"Error in PDF compilation: {e}")
             return None
-            
-        finally:
-            os.chdir(original_cwd)
 
     def _clean_auxiliary_files(self, directory, basename):
         """
@@ -14,11 +14,12 @@ class MailHelper:
     """A helper class for retrieve and sending emails."""
 
     _fields = ["SUBJECT", "FROM", "DATE", "TO", "MESSAGE-ID", "IN-REPLY-TO"]
+    # mail size is following RFC822.SIZE
+    re_size = re.compile(r'RFC822.SIZE (\d+)', re.IGNORECASE)
+    re_uid = re.compile(r'UID (\d+)', re.IGNORECASE)
 
     def __init__(self, imapserver, smtpserver=None, proxy=None):
         self._flags = set(["Seen", "Answered", "Flagged"])
-        # mail size is following RFC822.SIZE
-        self.re_size = re.compile(r'RFC822.SIZE (\d+)', re.IGNORECASE)
         if proxy:
             proxy_ip, proxy_port = proxy
             socks.setdefaultproxy(socks.SOCKS5, proxy_ip, proxy_port)
@@ -40,8 +41,26 @@ class MailHelper:
         if self.smtpclient is not None:
             self.smtpclient.quit()
 
-    def search(self, folder, condition):
+    def noop(self):
+        """Check that the IMAP connection is still alive, keeping it from timing out."""
+        try:
+            typ, _ = self.imapclient.noop()
+        except (imaplib.IMAP4.error, OSError):
+            return False
+        return 'OK' == typ
+
+    def select(self, folder):
         self.imapclient.select(folder)
+        # The untagged response is consumed once, so it is kept here
+        _, data = self.imapclient.response('UIDVALIDITY')
+        self._uidvalidity = str(data[0], 'utf-8') if data and data[0] else None
+
+    def uidvalidity(self):
+        """Return the UIDVALIDITY of the selected folder, UIDs are only valid along with it."""
+        return getattr(self, '_uidvalidity', None)
+
+    def search(self, folder, condition):
+        self.select(folder)
         # print(self.imapclient.list())
 
         typ, data = self.imapclient.uid('search', None, condition)
@@ -54,19 +73,53 @@ class MailHelper:
         # print(logtxt)
         return items
 
-    def fetch_header(self, email_uid):
-        """Retrieve the header of an email specified by return id."""
-        fetch_fields = "(RFC822.SIZE BODY.PEEK[HEADER.FIELDS (%s)])"
-        # print(fetch_fields, self._fields, email_uid)
+    @classmethod
+    def _header_items(cls, fields=None):
+        """The FETCH items of the size and the given header fields only."""
+        if fields is None:
+            fields = cls._fields
+        return "(RFC822.SIZE BODY.PEEK[HEADER.FIELDS (%s)])" % " ".join(f.upper() for f in fields)
+
+    def fetch_header(self, email_uid, fields=None):
+        """Retrieve the header of an email specified by return id.
+
+        Only the given fields are transferred, by default those in _fields.
+        """
+        # print(self._header_items(fields), email_uid)
         status, data = self.imapclient.uid('fetch', email_uid,
-                                           fetch_fields % " ".join(self._fields))
+                                           self._header_items(fields))
         if status != 'OK':
             print('Error retrieving headers.')
             return -1
+        return self._parse_header(data[0][0], data[0][1])
+
+    def fetch_headers(self, email_uids, fields=None):
+        """Retrieve the headers of several emails with a single FETCH command.
+
+        Returns:
+            dict: Headers keyed by the email UIDs, as strings.
+        """
+        status, data = self.imapclient.uid('fetch', ",".join(email_uids),
+                                           self._header_items(fields))
+        if status != 'OK':
+            print('Error retrieving headers.')
+            return {}
 
+        headers = {}
+        for respart in data:
+            # Parts are (envelope, header) tuples separated by closing b')'
+            if not isinstance(respart, tuple):
+                continue
+            uid_matcher = self.re_uid.search(str(respart[0], 'utf-8'))
+            if uid_matcher:
+                headers[uid_matcher.group(1)] = self._parse_header(*respart)
+        return headers
+
+    def _parse_header(self, envelope, raw_header):
+        """Parse a header fetched along with the RFC822.SIZE in its envelope."""
         header = {}
         parser = HeaderParser()
-        msg = parser.parsestr(str(data[0][1], 'utf-8'), True)
+        msg = parser.parsestr(str(raw_header, 'utf-8'), True)
         for key, val in msg.items():
             if key in ['From', 'To']:
                 # email addresses include two parts, (realname, email_addr)
@@ -76,7 +129,7 @@ class MailHelper:
             else:
                 header[key.lower()] = MailHelper.iconv_header(val)
         
-        size_matcher = self.re_size.search(str(data[0][0], 'utf-8'))
+        size_matcher = self.re_size.search(str(envelope, 'utf-8'))
         if size_matcher:
             size = int(size_matcher.group(1))
             header['size'] = f"{size/1024:6.3g} KB" if size < 1e6 else f"{size/1024/1024:6.3g} MB"
@@ -87,16 +140,47 @@ class MailHelper:
 
     def fetch_email(self, email_uid):
         """Parsing a given email to get title, body, and attachments."""
+        # PEEK leaves the \Seen flag alone, it is set once a confirmation is sent
+        typ, msg_data = self.imapclient.uid('fetch', email_uid, '(BODY.PEEK[])')
+        raw_messages = [respart[1] for respart in msg_data if isinstance(respart, tuple)]
+        del msg_data
+        return self._parse_email(raw_messages)
 
-        cnt = 1
-        body, attachments = '', list()
-        typ, msg_data = self.imapclient.uid('fetch', email_uid, '(RFC822)')
-        for respart in msg_data:
+    def fetch_emails(self, email_uids):
+        """Fetch several emails with a single FETCH command, saving a round trip per email.
+
+        Returns:
+            dict: (body, attachments) keyed by the email UIDs, as strings.
+        """
+        typ, msg_data = self.imapclient.uid('fetch', ",".join(email_uids), '(UID BODY.PEEK[])')
+        if typ != 'OK':
+            print('Error retrieving emails.')
+            return {}
+        messages = {}
+        for i, respart in enumerate(msg_data):
             if not isinstance(respart, tuple):
                 continue
-            # print(respart)
-            # respart_content = str(respart[1], 'utf-8')
-            msg = email.message_from_bytes(respart[1])
+            # The UID is reported before or after the message literal
+            uid_matcher = self.re_uid.search(str(respart[0], 'utf-8'))
+            if uid_matcher is None and i + 1 < len(msg_data) and isinstance(msg_data[i + 1], bytes):
+                uid_matcher = self.re_uid.search(str(msg_data[i + 1], 'utf-8'))
+            if uid_matcher:
+                messages.setdefault(uid_matcher.group(1), []).append(respart[1])
+        # Each raw email is released as soon as it is parsed
+        del msg_data
+        return {uid: self._parse_email(messages.pop(uid)) for uid in list(messages)}
+
+    def _parse_email(self, raw_messages):
+        """Get the body and attachments from the raw bytes of an email.
+
+        The list of raw bytes is emptied, and the encoded attachments are
+        dropped once decoded, so that large emails are not held in memory
+        several times over.
+        """
+        cnt = 1
+        body, attachments = '', list()
+        while raw_messages:
+            msg = email.message_from_bytes(raw_messages.pop(0))
             # An email with attachments must be multipart.
             if msg.get_content_maintype() != 'multipart':
                 continue
@@ -128,6 +212,7 @@ class MailHelper:
 
                 # Download the content of the mail
                 data = part.get_payload(decode=True)
+                part.set_payload('')
                 if not data:
                     continue
 
@@ -149,7 +234,10 @@ class MailHelper:
         self.imapclient.uid("STORE", email_uid, "+FLAGS", "(\\Seen)")
 
     def flag(self, email_uid, flags):
-        """Mark an email as read."""
+        """Mark an email as read.
+
+        Several emails are flagged at once by comma-separated UIDs.
+        """
         flags = list(set(flags) & self._flags)
         if flags:
             flag_str = " ".join([f"\\{flag}" for flag in flags])
@@ -1,4 +1,7 @@
 from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
+import os
 import yaml
 import shutil
 import tarfile
@@ -8,13 +11,66 @@ from jinja2 import Environment, FileSystemLoader
 from pathlib import Path
 import logging
 import argparse
-from xdufacool.utils import setup_logging, validate_paths
+from xdufacool.utils import setup_logging, validate_paths, jinja_bytecode_cache
 from xdufacool.converters import NotebookConverter, PDFCompiler, LaTeXConverter
 from zipfile import ZipFile
 import tempfile
 from tqdm import tqdm
 import pypandoc
 
+@lru_cache(maxsize=1)
+def _get_notebook_converter():
+    """Return a NotebookConverter shared by all submissions, building the
+    nbconvert exporter and loading its templates only once."""
+    return NotebookConverter()
+
+@lru_cache(maxsize=1)
+def _get_latex_converter():
+    """Return a LaTeXConverter shared by all assignments, whose environment
+    compiles each template once."""
+    return LaTeXConverter()
+
+@lru_cache(maxsize=None)
+def _get_template_env(folder):
+    """Return the Jinja environment of a template folder, which keeps the
+    templates it has compiled and recompiles them only if they change."""
+    return Environment(loader=FileSystemLoader(folder), bytecode_cache=jinja_bytecode_cache())
+
+def _iter_matching(root, prefix):
+    """Yield (path, stat) of the files under root whose names start with prefix.
+
+    The paths are plain strings.
+
+    The entries come from os.scandir, so directories need no extra stat call
+    and the stat of a matching file is fetched once. Directories are walked
+    with a stack, so nested generators do not pass every entry up the tree.
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.startswith(prefix) and entry.is_file():
+                    yield entry.path, entry.stat()
+
+def _generate_report(submission, submission_dir, relative_path):
+    submission.generate_report(relative_path, submission_dir)
+
+def _add_report(submission, submission_dir, relative_path):
+    submission.add_report(submission_dir, relative_path)
+
+def _warn_convert(submission, submission_dir, relative_path):
+    # TODO: Implement conversion from .doc, .docx to PDF
+    logging.warning(f"To convert: {relative_path}")
+
+def _warn_decompress(submission, submission_dir, relative_path):
+    # TODO: Implement extraction of alternative compressed formats (e.g., .rar, .7z)
+    logging.warning(f"To decompress manually: {relative_path}")
+
+def _ignore_file(submission, submission_dir, relative_path):
+    logging.warning(f"Ignore: {relative_path}")
+
 class Teacher:
     def __init__(self, teacher_id, name, email=None, department=None):
         self.teacher_id = teacher_id
@@ -178,7 +234,7 @@ class Assignment:
         }
         logging.debug(f"Course context: {self.course} {self.assignment_folder.parent}")
         notification_template = self.course.notification_template
-        env = Environment(loader=FileSystemLoader(self.assignment_folder.parent))
+        env = _get_template_env(self.assignment_folder.parent)
         # template_file = self.assignment_folder.parent / notification_template
         # with open(template_file, 'r') as f:
         #     template_source = f.read()
@@ -207,53 +263,66 @@ class Assignment:
             list: A list of dictionaries, where each dictionary represents a submission
                   and contains the extracted information (e.g., student_id, assignment_id, file_path).
         """
-        submission_dir = Path(base_dir) / self.common_name()
+        common_name = self.common_name()
+        submission_dir = Path(base_dir) / common_name
         logging.info(f"Collecting submissions from {submission_dir} ...")
         if not submission_dir.exists():
             logging.error(f"Error: Directory {submission_dir} does not exist.")
             return None        
-        file_paths = list(submission_dir.rglob(f"{self.common_name()}*"))
-        file_paths.sort(key=lambda x: (x.suffix.lower() != '.pdf', x))
-        pbar = tqdm(file_paths, desc="Processing submissions")
-        for file_path in pbar:
-            relative_path = file_path.relative_to(submission_dir)
+        # Subclasses of the assignment types use the submission class of their base
+        submission_class = next((_SUBMISSION_CLASSES[cls] for cls in type(self).__mro__
+                                 if cls in _SUBMISSION_CLASSES), None)
+        handlers = self._file_handlers()
+        # PDF files go first, the sort keys are made of strings only
+        keyed = []
+        for path, st in _iter_matching(submission_dir, common_name):
+            stem, ext = os.path.splitext(path)
+            ext = ext.lower()
+            keyed.append((ext != '.pdf', path.split(os.sep), path, stem, ext, st))
+        keyed.sort(key=itemgetter(0, 1))
+        # The walked paths all start with the submission directory
+        skip = len(os.path.join(submission_dir, ''))
+        pbar = tqdm(keyed, desc="Processing submissions")
+        for _, _, path, stem, ext, file_stat in pbar:
+            relative_path = Path(path[skip:])
             logging.info(f"Processing: {relative_path}")
-            if not file_path.is_file():
-                logging.debug(f"Skipping {relative_path}")
+            head, _, student_name = os.path.basename(stem).rpartition('-')
+            # Names start with common_name, an ID and a name must follow it
+            if len(head) <= len(common_name):
+                logging.warning(f"Skipping {relative_path}: no student ID and name in its name.")
                 continue
-            student_id, student_name = file_path.stem.split('-')[-2:]
+            student_id = head.rpartition('-')[2]
             if not student_id in self.submissions:
                 student = Student(student_id, student_name)
                 pbar.set_description(f"Processing {student}")
-                submission_date = datetime.fromtimestamp(file_path.stat().st_mtime)
-                if isinstance(self, CodingAssignment):
-                    submission_class = CodingSubmission
-                elif isinstance(self, ReportAssignment):
-                    submission_class = ReportSubmission
-                elif isinstance(self, ChallengeAssignment):
-                    submission_class = ChallengeSubmission
-                else:
+                if submission_class is None:
                     logging.debug(f"Unknown assignment type: {type(self)}")
                     continue
-                submission = submission_class(self, student, submission_date)
+                # The datetime is only built if the date is used
+                submission = submission_class(self, student, file_stat.st_mtime)
                 self.add_submission(submission)
             else:
                 submission = self.submissions[student_id]
                 logging.info(f"{submission} already exists.")
 
-            file_ext = file_path.suffix.lower()
-            if file_ext in self.accepted_extensions['compressed']:
-                submission.generate_report(relative_path, submission_dir)
-            elif file_ext in self.accepted_extensions['document']:
-                submission.add_report(submission_dir, relative_path)                
-            elif file_ext in self.alternative_extensions['document']:
-                # TODO: Implement conversion from .doc, .docx to PDF
-                logging.warning(f"To convert: {relative_path}")
-            elif file_ext in self.alternative_extensions['compressed']:
-                # TODO: Implement extraction of alternative compressed formats (e.g., .rar, .7z)
-                logging.warning(f"To decompress manually: {relative_path}")
-            else:
-                logging.warning(f"Ignore: {relative_path}")
+            handler = handlers.get(ext, _ignore_file)
+            handler(submission, submission_dir, relative_path)
+
+    def _file_handlers(self):
+        """Map file extensions to the handlers of submitted files.
+
+        Accepted extensions take precedence over alternative ones.
+        """
+        handlers = {}
+        for ext in self.alternative_extensions['compressed']:
+            handlers[ext] = _warn_decompress
+        for ext in self.alternative_extensions['document']:
+            handlers[ext] = _warn_convert
+        for ext in self.accepted_extensions['document']:
+            handlers[ext] = _add_report
+        for ext in self.accepted_extensions['compressed']:
+            handlers[ext] = _generate_report
+        return handlers
 
     def merge_submissions(self, base_dir, output_name=None):
         """
@@ -278,7 +347,7 @@ class Assignment:
             output_name = f"{self.common_name()}-merged"
 
         try:
-            latex_converter = LaTeXConverter()
+            latex_converter = _get_latex_converter()
 
             latex_content = latex_converter.render_template(
                 'pdfmerge.tex.j2',
@@ -341,7 +410,7 @@ class CodingAssignment(Assignment):
         """Renders the environment file using Jinja2."""
         logging.debug(f"{self.assignment_folder}")
         template = self.assignment_folder / self.environment_template
-        env = Environment(loader=FileSystemLoader(template.parent))
+        env = _get_template_env(template.parent)
         template = env.get_template(template.name)
         context = {'course_abbrev': self.course.abbreviation, 'serial_number': self.assignment_id}
         rendered_content = template.render(context)
@@ -471,6 +540,17 @@ class Submission:
         self.score = score
         self.report_file = None  # Initialize to None
         
+    @property
+    def submission_date(self):
+        """The submission date, a timestamp given to the constructor is converted on first use."""
+        if isinstance(self._submission_date, (int, float)):
+            self._submission_date = datetime.fromtimestamp(self._submission_date)
+        return self._submission_date
+
+    @submission_date.setter
+    def submission_date(self, value):
+        self._submission_date = value
+
     def __repr__(self):
         return f"{type(self).__name__}({vars(self)}) at {hex(id(self))}"
 
@@ -546,8 +626,7 @@ class CodingSubmission(Submission):
                 if ipynb_files:
                     ipynb_file = ipynb_files[0]
                     logging.debug(f"Found IPYNB file for coding assignment: {ipynb_file}")
-                    # Initialize NotebookConverter
-                    converter = NotebookConverter()
+                    converter = _get_notebook_converter()
                     # TODO: Get submission date from email metadata instead of zip file modification time
                     submission_date = datetime.fromtimestamp(zip_filepath.stat().st_mtime)
                     metadata = {
@@ -591,6 +670,13 @@ class ChallengeSubmission(Submission):
     def __repr__(self):
         return f"{type(self).__name__}({vars(self)}) at {hex(id(self))}"
 
+# The submission class of each assignment type
+_SUBMISSION_CLASSES = {
+    CodingAssignment: CodingSubmission,
+    ReportAssignment: ReportSubmission,
+    ChallengeAssignment: ChallengeSubmission,
+}
+
 def collect_submissions(args):
     """Handles the 'collect' subcommand."""
     config_file = args.config
@@ -17,8 +17,11 @@
 #
 #
 #
+import os
 import sys
 import logging
+from functools import lru_cache
+import jinja2
 from pathlib import Path
 from typing import Union, List
 
@@ -73,5 +76,56 @@ def validate_paths(base_path: Path, file_paths: Union[str, List[str]], descripti
 
     return valid_paths
 
+def jinja_bytecode_cache():
+    """
+    Return a cache persisting compiled Jinja templates across runs.
+
+    By default, Jinja keeps the cache in a private folder of the current user
+    in the system temporary directory, whose owner and permissions it checks.
+    The XDUFACOOL_JINJA_CACHE environment variable gives another folder, made
+    readable by its owner only, or disables the cache when set to "0", "off"
+    or an empty string.
+
+    Returns:
+        A jinja2.FileSystemBytecodeCache, or None if the cache is disabled.
+    """
+    cache_dir = os.environ.get('XDUFACOOL_JINJA_CACHE')
+    if cache_dir is not None and cache_dir.lower() in ('', '0', 'off'):
+        return None
+    try:
+        if cache_dir is None:
+            return jinja2.FileSystemBytecodeCache(pattern='%s.cache')
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    except (OSError, RuntimeError) as e:
+        logging.warning(f"Jinja bytecode cache disabled: {e}")
+        return None
+    return jinja2.FileSystemBytecodeCache(cache_dir, '%s.cache')
+
+@lru_cache(maxsize=None)
+def latex_template_env(template_dir):
+    """
+    Return the Jinja environment of the LaTeX templates in template_dir.
+
+    All converters of a template directory share the environment. Compiled
+    templates are never evicted, and template files are not checked for
+    changes during a run. Across runs, they are kept in the bytecode cache.
+    """
+    return jinja2.Environment(
+        loader=jinja2.FileSystemLoader(searchpath=template_dir),
+        block_start_string=r'\BLOCK{',
+        block_end_string='}',
+        variable_start_string=r'\VAR{',
+        variable_end_string='}',
+        comment_start_string=r'\#{',
+        comment_end_string='}',
+        line_statement_prefix='%%',
+        line_comment_prefix='%#',
+        trim_blocks=True,
+        autoescape=False,
+        cache_size=-1,
+        auto_reload=False,
+        bytecode_cache=jinja_bytecode_cache(),
+    )
+
 # 
 # utils.py ends here